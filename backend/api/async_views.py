@@ -0,0 +1,80 @@
+"""Асинхронные представления для запуска под ASGI.
+
+В Django 3.2 нет асинхронного ORM, а DRF не поддерживает асинхронные
+представления, поэтому синхронный код выполняется в отдельном пуле
+потоков размером ASYNC_VIEW_THREADS. Без пула Django запускал бы
+синхронные представления через sync_to_async в одном потоке на процесс.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404, HttpResponseRedirect
+
+from recipes.shortlinks import local_cache, resolve_short_id
+
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_VIEW_THREADS,
+            thread_name_prefix='async-views',
+        )
+    return _executor
+
+
+def call_with_connections(func, *args, **kwargs):
+    """Вызывает func, закрывая устаревшие соединения потока пула."""
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(func, *args, **kwargs):
+    """Выполняет синхронную функцию в пуле с контекстом текущего запроса."""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(),
+        functools.partial(
+            context.run, call_with_connections, func, *args, **kwargs
+        ),
+    )
+
+
+def render_view(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    if hasattr(response, 'render') and callable(response.render):
+        response.render()
+    return response
+
+
+def async_view(view):
+    """Оборачивает синхронное представление DRF в асинхронное.
+
+    Ответ рендерится в том же потоке пула, чтобы сериализация не
+    выполнялась в потоке обработчика Django.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run_in_pool(render_view, view, request, *args, **kwargs)
+
+    return wrapper
+
+
+async def short_link_redirect(request, short_id):
+    """Редирект по короткой ссылке без похода в пул для частых ссылок."""
+    recipe_id = local_cache.get(short_id)
+    if recipe_id is None:
+        recipe_id = await run_in_pool(resolve_short_id, short_id)
+    if recipe_id is None:
+        raise Http404('Рецепт не найден.')
+    return HttpResponseRedirect(f'/recipes/{recipe_id}/')
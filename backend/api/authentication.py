@@ -0,0 +1,73 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+User = get_user_model()
+
+# Поля пользователя, которые хранятся в кэше вместе с токеном. Пароль сюда
+# не попадает, а поля, которые меняются через QuerySet.update() в обход
+# post_save (например, avatar_variants), читаются из базы при обращении.
+CACHED_USER_FIELDS = (
+    'id',
+    'email',
+    'username',
+    'first_name',
+    'last_name',
+    'avatar',
+    'is_active',
+    'is_staff',
+    'is_superuser',
+)
+
+
+def token_cache_key(key):
+    return f'auth_token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def revoke_cached_tokens(user_id):
+    """Удаляет из кэша все токены пользователя."""
+    cache.delete_many([
+        token_cache_key(key)
+        for key in Token.objects.filter(user_id=user_id).values_list(
+            'key', flat=True
+        )
+    ])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кэшированием пользователя.
+
+    Формат токенов не меняется, но пользователь собирается из полей
+    CACHED_USER_FIELDS, сохранённых в кэше, а не читается из базы на каждом
+    запросе. Остальные поля загружаются из базы при первом обращении.
+    Запись удаляется при выходе, изменении пользователя и смене пароля.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        fields = cache.get(cache_key)
+        if fields is not None:
+            user = User.from_db(DEFAULT_DB_ALIAS, list(fields), [
+                fields[field.attname]
+                for field in User._meta.concrete_fields
+                if field.attname in fields
+            ])
+            return user, Token(key=key, user=user)
+        user, token = super().authenticate_credentials(key)
+        cache.set(
+            cache_key,
+            {
+                name: User._meta.get_field(name).get_prep_value(
+                    getattr(user, name)
+                )
+                for name in CACHED_USER_FIELDS
+            },
+            settings.TOKEN_CACHE_TIMEOUT,
+        )
+        return user, token
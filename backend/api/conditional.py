@@ -0,0 +1,93 @@
+import hashlib
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+
+from recipes.models import Ingredients, Recipe, Tag
+from recipes.versions import get_versions, user_state_key, version_key
+from .replicas import is_settled
+
+
+User = get_user_model()
+
+
+def version_to_datetime(version):
+    """Переводит версию (время изменения в наносекундах) в datetime."""
+    return datetime.fromtimestamp(version / 10 ** 9, tz=timezone.utc)
+
+
+def make_etag(*parts):
+    return hashlib.md5(
+        ':'.join(map(str, parts)).encode()
+    ).hexdigest()
+
+
+def table_etag(model):
+    """ETag ответа по версии таблицы и адресу запроса."""
+    def etag(request, *args, **kwargs):
+        key = version_key(model)
+        version = get_versions([key])[key]
+        if not is_settled(version):
+            return None
+        return make_etag(version, request.get_full_path())
+    return etag
+
+
+def table_last_modified(model):
+    """Last-Modified ответа по версии таблицы."""
+    def last_modified(request, *args, **kwargs):
+        key = version_key(model)
+        version = get_versions([key])[key]
+        if not is_settled(version):
+            return None
+        return version_to_datetime(version)
+    return last_modified
+
+
+def get_recipe_state(request, pk):
+    """Время изменения рецепта и версии всего, что попадает в ответ.
+
+    Учитываются сам рецепт, профиль автора, справочники тегов и
+    ингредиентов, а также избранное, корзина и подписки пользователя.
+    """
+    if not hasattr(request, '_recipe_state'):
+        try:
+            recipe = Recipe.objects.filter(pk=pk).values_list(
+                'updated_at', 'author_id'
+            ).first()
+        except (TypeError, ValueError):
+            recipe = None
+        if recipe is None:
+            request._recipe_state = None
+        else:
+            updated_at, author_id = recipe
+            keys = [
+                version_key(Recipe, pk),
+                version_key(User, author_id),
+                version_key(Tag),
+                version_key(Ingredients),
+            ]
+            if request.user.is_authenticated:
+                keys.append(user_state_key(request.user.pk))
+            versions = get_versions(keys)
+            request._recipe_state = (
+                updated_at,
+                [versions[key] for key in keys],
+            )
+    return request._recipe_state
+
+
+def recipe_etag(request, pk=None, *args, **kwargs):
+    state = get_recipe_state(request, pk)
+    if state is None or not is_settled(*state[1]):
+        return None
+    updated_at, versions = state
+    return make_etag(updated_at.isoformat(), *versions)
+
+
+def recipe_last_modified(request, pk=None, *args, **kwargs):
+    state = get_recipe_state(request, pk)
+    if state is None or not is_settled(*state[1]):
+        return None
+    updated_at, versions = state
+    return max(updated_at, *map(version_to_datetime, versions))
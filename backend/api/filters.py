@@ -1,9 +1,10 @@
 from django_filters.rest_framework import (
     BooleanFilter,
+    CharFilter,
     FilterSet,
     ModelMultipleChoiceFilter
 )
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import OrderingFilter, SearchFilter
 
 from recipes.models import Recipe, Tag
 
@@ -14,6 +15,16 @@ class IngredientFilter(SearchFilter):
     search_param = 'name'
 
 
+class RecipeOrderingFilter(OrderingFilter):
+    """Сортировка рецептов с id как вторым ключом для одинаковых значений."""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and not {'id', '-id'} & set(ordering):
+            ordering = [*ordering, '-id']
+        return ordering
+
+
 class RecipeFilter(FilterSet):
     """Фильтраци для рецептов."""
 
@@ -26,10 +37,17 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = BooleanFilter(
         method='filter_shopping_cart'
     )
+    search = CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags',
+            'author',
+            'is_favorited',
+            'is_in_shopping_cart',
+            'search',
+        )
 
     def filter_favorited(self, queryset, name, value):
         user = (
@@ -50,3 +68,9 @@ class RecipeFilter(FilterSet):
         if value and user:
             return queryset.filter(in_shopping_lists__user_id=user.id)
         return queryset
+
+    def filter_search(self, queryset, name, value):
+        value = value.strip()
+        if not value:
+            return queryset
+        return queryset.search(value)
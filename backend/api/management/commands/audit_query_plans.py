@@ -0,0 +1,140 @@
+import tempfile
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    teardown_databases,
+)
+
+from benchmarks.dataset import DatasetSize, seed
+from benchmarks.plans import SelectCollector, explain, find_problems
+from benchmarks.runner import ScenarioRunner, build_scenarios
+from recipes.search import ingredient_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN (ANALYZE, BUFFERS) для SELECT-запросов всех '
+        'эндпоинтов API на наборе данных бенчмарка и завершается ошибкой, '
+        'если в планах есть Seq Scan или оценки больше порога.'
+    )
+
+    def add_arguments(self, parser):
+        size = DatasetSize()
+        for name, value in vars(size).items():
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=int,
+                default=value,
+                help=f'Размер набора данных: {name}',
+            )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--max-rows',
+            type=int,
+            default=1000,
+            help='Максимальная оценка числа строк в узле плана',
+        )
+        parser.add_argument(
+            '--allow-seq-scan',
+            action='append',
+            default=[],
+            metavar='TABLE',
+            help='Таблица, для которой Seq Scan допустим',
+        )
+        parser.add_argument(
+            '--planner-seqscan',
+            action='store_true',
+            help='Не запрещать планировщику Seq Scan',
+        )
+        parser.add_argument(
+            '--only',
+            help='Проверять только сценарии, начинающиеся с этой строки',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError(
+                'EXPLAIN ANALYZE в формате JSON поддерживается только '
+                'для PostgreSQL.'
+            )
+        size = DatasetSize(**{
+            name: options[name] for name in vars(DatasetSize())
+        })
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=False
+        )
+        try:
+            with tempfile.TemporaryDirectory() as media_root:
+                with override_settings(
+                    ALLOWED_HOSTS=['testserver'],
+                    MEDIA_ROOT=media_root,
+                    IMAGE_VARIANT_WORKERS=0,
+                ):
+                    problems = self.audit_scenarios(size, options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+        if problems:
+            raise CommandError(
+                f'Найдено проблем в планах запросов: {problems}.'
+            )
+        self.stdout.write(self.style.SUCCESS('Проблем в планах не найдено.'))
+
+    def audit_scenarios(self, size, options):
+        self.stdout.write('Заполнение тестовой базы...')
+        dataset = seed(size, options['seed'])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        runner = ScenarioRunner(dataset)
+        total = 0
+        for scenario in build_scenarios(dataset):
+            if options['only'] and not scenario.name.startswith(
+                options['only']
+            ):
+                continue
+            collector = SelectCollector()
+
+            def collect(call):
+                with connection.execute_wrapper(collector):
+                    return call(), None
+
+            cache.clear()
+            # После сброса кэша версии заводятся заново, и префиксный индекс
+            # перестраивается полным чтением таблицы ингредиентов: это не
+            # проблема плана, поэтому индекс строится до сбора запросов.
+            ingredient_index.search('')
+            runner.run_once(scenario, collect)
+            problems = self.audit_queries(collector.queries, options)
+            count = sum(len(found) for found in problems.values())
+            total += count
+            status = (
+                self.style.ERROR(f'проблем {count}') if count
+                else self.style.SUCCESS('ok')
+            )
+            self.stdout.write(
+                f'{scenario.name:40} запросов {len(collector.queries):3}  '
+                f'{status}'
+            )
+            for sql, found in problems.items():
+                self.stdout.write(f'    {sql[:300]}')
+                for problem in found:
+                    self.stdout.write(f'      {problem}')
+        return total
+
+    def audit_queries(self, queries, options):
+        problems = {}
+        for sql, params in queries.items():
+            plan = explain(
+                connection, sql, params, seqscan=options['planner_seqscan']
+            )
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{sql}\n{plan}')
+            found = find_problems(
+                plan, options['max_rows'], options['allow_seq_scan']
+            )
+            if found:
+                problems[sql] = found
+        return problems
@@ -0,0 +1,148 @@
+import json
+import platform
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    teardown_databases,
+)
+
+from benchmarks.dataset import DatasetSize, seed
+from benchmarks.runner import ScenarioRunner, build_scenarios, compare
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку, число запросов к БД и память для всех '
+        'эндпоинтов API на детерминированном наборе данных в тестовой БД.'
+    )
+
+    def add_arguments(self, parser):
+        size = DatasetSize()
+        for name, value in vars(size).items():
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=int,
+                default=value,
+                help=f'Размер набора данных: {name}',
+            )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--only',
+            help='Запускать только сценарии, начинающиеся с этой строки',
+        )
+        parser.add_argument(
+            '--output',
+            default='benchmark-results.json',
+            help='Файл для результатов в формате JSON',
+        )
+        parser.add_argument(
+            '--compare',
+            help='Файл с результатами предыдущего запуска для сравнения',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.25,
+            help='Допустимый относительный рост p50 при сравнении',
+        )
+
+    def handle(self, *args, **options):
+        size = DatasetSize(**{
+            name: options[name] for name in vars(DatasetSize())
+        })
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(Path(options['compare']).read_text())
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Не удалось прочитать эталон: {error}')
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=False
+        )
+        try:
+            with tempfile.TemporaryDirectory() as media_root:
+                with override_settings(
+                    ALLOWED_HOSTS=['testserver'],
+                    MEDIA_ROOT=media_root,
+                    IMAGE_VARIANT_WORKERS=0,
+                ):
+                    endpoints = self.run_scenarios(size, options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+        results = {
+            'meta': {
+                'commit': get_commit(),
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'dataset': vars(size),
+                'seed': options['seed'],
+                'iterations': options['iterations'],
+            },
+            'endpoints': endpoints,
+        }
+        Path(options['output']).write_text(
+            json.dumps(results, ensure_ascii=False, indent=2)
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Результаты сохранены в {options['output']}."
+        ))
+        if baseline is not None:
+            regressions = compare(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError(
+                    'Обнаружены регрессии:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий не найдено.'))
+
+    def run_scenarios(self, size, options):
+        cache.clear()
+        self.stdout.write('Заполнение тестовой базы...')
+        dataset = seed(size, options['seed'])
+        runner = ScenarioRunner(
+            dataset,
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+        )
+        endpoints = {}
+        for scenario in build_scenarios(dataset):
+            if options['only'] and not scenario.name.startswith(
+                options['only']
+            ):
+                continue
+            result = endpoints[scenario.name] = runner.run_scenario(scenario)
+            self.stdout.write(
+                f"{scenario.name:40} "
+                f"p50 {result['latency_ms']['p50']:8.2f} мс  "
+                f"p99 {result['latency_ms']['p99']:8.2f} мс  "
+                f"запросов {result['queries']['max']:3}  "
+                f"память {result['memory_peak_kb']:8.1f} КБ"
+                + (f"  ошибок {result['errors']}" if result['errors'] else '')
+            )
+        return endpoints
@@ -0,0 +1,130 @@
+import json
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.load import run_load, serve
+from recipes.checks import shared_cache_errors
+from recipes.models import Ingredients, Recipe
+
+
+MODES = ('wsgi', 'asgi')
+
+
+def build_paths(recipes):
+    """Горячие пути чтения: теги, поиск ингредиентов, рецепт, ссылка."""
+    ingredient = Ingredients.objects.order_by('id').values_list(
+        'name', flat=True
+    ).first()
+    paths = ['/api/tags/']
+    if ingredient:
+        paths.append(
+            '/api/ingredients/?' + urlencode({'name': ingredient[:3]})
+        )
+    for recipe_id, short_id in Recipe.objects.order_by('-id').values_list(
+        'id', 'short_id'
+    )[:recipes]:
+        paths.append(f'/api/recipes/{recipe_id}/')
+        if short_id:
+            paths.append(f'/r/{short_id}/')
+    return paths
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность gunicorn в режимах WSGI и ASGI '
+        'на горячих эндпоинтах чтения. Серверы запускаются на свободном '
+        'порту с текущими настройками и работают с основной базой данных, '
+        'которую нужно заранее заполнить, например generate_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modes', nargs='+', choices=MODES, default=list(MODES)
+        )
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=15,
+            help='Длительность нагрузки на каждый режим в секундах',
+        )
+        parser.add_argument('--warmup', type=float, default=3)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.GUNICORN_WORKERS,
+            help='Число воркеров gunicorn; больше одного требует общего кэша',
+        )
+        parser.add_argument(
+            '--slow-clients',
+            type=int,
+            default=0,
+            help='Число соединений, медленно передающих заголовки',
+        )
+        parser.add_argument(
+            '--recipes',
+            type=int,
+            default=20,
+            help='Сколько последних рецептов запрашивать',
+        )
+        parser.add_argument(
+            '--output',
+            default='load-test-results.json',
+            help='Файл для результатов в формате JSON',
+        )
+
+    def handle(self, *args, **options):
+        for error in shared_cache_errors(options['workers']):
+            raise CommandError(f'{error.msg} {error.hint}')
+        paths = build_paths(options['recipes'])
+        if len(paths) < 3:
+            raise CommandError(
+                'В базе нет рецептов: заполните её перед нагрузочным тестом.'
+            )
+        results = {
+            'meta': {
+                'concurrency': options['concurrency'],
+                'duration': options['duration'],
+                'workers': options['workers'],
+                'slow_clients': options['slow_clients'],
+                'paths': paths,
+            },
+            'modes': {},
+        }
+        for mode in options['modes']:
+            self.stdout.write(f'Режим {mode}...')
+            try:
+                result = self.run_mode(mode, paths, options)
+            except RuntimeError as error:
+                raise CommandError(str(error))
+            results['modes'][mode] = result
+            latency = result.get('latency_ms', {})
+            self.stdout.write(
+                f"{mode:5} {result.get('rps', 0):9.1f} запр/с  "
+                f"p50 {latency.get('p50', 0):8.2f} мс  "
+                f"p99 {latency.get('p99', 0):8.2f} мс  "
+                f"ошибок {result['errors']}"
+            )
+        Path(options['output']).write_text(
+            json.dumps(results, ensure_ascii=False, indent=2)
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Результаты сохранены в {options['output']}."
+        ))
+
+    def run_mode(self, mode, paths, options):
+        with serve(mode, options['workers'], settings.BASE_DIR) as port:
+            if options['warmup']:
+                run_load(
+                    port, paths, options['concurrency'], options['warmup']
+                )
+            return run_load(
+                port,
+                paths,
+                options['concurrency'],
+                options['duration'],
+                options['slow_clients'],
+            )
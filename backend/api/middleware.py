@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+logger = logging.getLogger(__name__)
+
+current_stats = ContextVar('query_stats', default=None)
+
+
+class QueryStats:
+    """Обёртка курсора, считающая запросы к БД в рамках одного запроса."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.connections = 0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values())
+
+    def most_repeated(self, length=200):
+        for sql, count in self.statements.most_common(1):
+            if count > 1:
+                return f'{sql[:length]} ({count} раз)'
+        return '-'
+
+
+class ConnectionReuse:
+    """Доля запросов к API с обращением к БД без открытия соединения."""
+
+    def __init__(self):
+        self.requests = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+
+    def add(self, stats):
+        if not stats.count:
+            return
+        with self._lock:
+            self.requests += 1
+            self.reused += not stats.connections
+
+    @property
+    def rate(self):
+        return self.reused / self.requests if self.requests else 0.0
+
+
+connection_reuse = ConnectionReuse()
+
+
+def record_query(execute, sql, params, many, context):
+    """Передаёт запрос статистике, если её завёл текущий запрос."""
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def instrument_connection(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def count_connection(connection, **kwargs):
+    """Учитывает новое соединение в статистике текущего запроса."""
+    instrument_connection(connection)
+    stats = current_stats.get()
+    if stats is not None:
+        stats.connections += 1
+
+
+def get_view_name(request):
+    """Имя обработчика вида RecipeViewSet.list или ShortLinkRedirectView."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view = match.func
+    view_class = getattr(view, 'cls', None) or getattr(
+        view, 'view_class', None
+    )
+    if view_class is None:
+        return match.view_name or getattr(view, '__name__', None)
+    action = (getattr(view, 'actions', None) or {}).get(
+        request.method.lower()
+    )
+    if action:
+        return f'{view_class.__name__}.{action}'
+    return view_class.__name__
+
+
+class QueryInstrumentationMiddleware:
+    """Добавляет к ответу число и время запросов к БД.
+
+    Включается настройкой QUERY_INSTRUMENTATION. В выключенном состоянии
+    Django исключает middleware из цепочки при старте. Заголовок
+    X-DB-Connection-Reuse показывает, какая доля запросов процесса
+    обошлась без открытия соединения с БД. Статистика запроса
+    хранится в ContextVar, поэтому учитываются и запросы, которые
+    асинхронные представления выполняют в пуле потоков. Запросы, которые
+    потоковый ответ выполняет уже после отдачи заголовков, не учитываются.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        connection_created.connect(
+            count_connection, dispatch_uid='query_instrumentation'
+        )
+        for connection in connections.all():
+            instrument_connection(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = QueryStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.process_response(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.process_response(request, response, stats, started)
+
+    def process_response(self, request, response, stats, started):
+        total = (time.perf_counter() - started) * 1000
+        database = stats.duration * 1000
+        connection_reuse.add(stats)
+        response['X-Query-Count'] = str(stats.count)
+        response['X-DB-Connection-Reuse'] = f'{connection_reuse.rate:.3f}'
+        response['Server-Timing'] = (
+            f'db;dur={database:.1f};desc="{stats.count} queries, '
+            f'{stats.duplicates} duplicates, '
+            f'{stats.connections} connects", app;dur={total:.1f}'
+        )
+        if (
+            total > settings.SLOW_REQUEST_THRESHOLD_MS
+            or stats.count > settings.SLOW_REQUEST_QUERY_THRESHOLD
+        ):
+            logger.warning(
+                'Медленный запрос %s %s (%s): %.1f мс, запросов к БД %d '
+                '(%.1f мс), новых соединений %d, повторов %d: %s',
+                request.method,
+                request.get_full_path(),
+                get_view_name(request),
+                total,
+                stats.count,
+                database,
+                stats.connections,
+                stats.duplicates,
+                stats.most_repeated(),
+            )
+        return response
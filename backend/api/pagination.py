@@ -0,0 +1,172 @@
+import json
+from collections import OrderedDict
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.response import Response
+
+
+class KeysetCursorPagination(CursorPagination):
+    """Курсорная пагинация по убыванию id.
+
+    Страница выбирается условием по всем полям сортировки (последнее из
+    них — уникальный id) вместо OFFSET, поэтому время ответа не зависит
+    от глубины, а строки с одинаковыми значениями не теряются. Общее
+    количество не считается, если его не запросили параметром
+    count=exact или count=estimate.
+    """
+
+    ordering = '-id'
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    count_query_param = 'count'
+
+    def get_ordering(self, request, queryset, view):
+        """Порядок из фильтра сортировки вьюсета, если он задан в запросе.
+
+        Иначе сохраняется явная сортировка queryset, например по
+        релевантности поиска, если она заканчивается уникальным id.
+        """
+        for backend in getattr(view, 'filter_backends', ()):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    return tuple(ordering)
+        ordering = queryset.query.order_by
+        if (
+            ordering
+            and all(isinstance(field, str) for field in ordering)
+            and ordering[-1].lstrip('-') in ('id', 'pk')
+        ):
+            return tuple(ordering)
+        if isinstance(self.ordering, str):
+            return (self.ordering,)
+        return tuple(self.ordering)
+
+    def get_keyset_filter(self, position, reverse):
+        """Условие «после позиции» по всем полям сортировки."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list):
+            values = [values]
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = self.get_count(
+            queryset,
+            request.query_params.get(self.count_query_param)
+        )
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(current_position, reverse)
+            )
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if has_following_position else None
+        )
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        """Позиция — значения всех полей сортировки в JSON."""
+        return json.dumps([
+            instance[field.lstrip('-')] if isinstance(instance, dict)
+            else getattr(instance, field.lstrip('-'))
+            for field in ordering
+        ])
+
+    @staticmethod
+    def get_count(queryset, mode):
+        if mode == 'estimate':
+            connection = connections[queryset.db]
+            if connection.vendor == 'postgresql':
+                sql, params = queryset.order_by().query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+                    plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]['Plan']['Plan Rows'])
+            mode = 'exact'
+        if mode == 'exact':
+            return queryset.count()
+        return None
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+
+class TrendingCursorPagination(KeysetCursorPagination):
+    """Курсорная пагинация популярных рецептов по убыванию оценки."""
+
+    ordering = ('-trending_score', '-id')
+
+
+class FeedCursorPagination(KeysetCursorPagination):
+    """Пагинация ленты только вперёд: ссылки previous нет."""
+
+    def get_previous_link(self):
+        return None
+
+
+class CursorPaginationMixin:
+    """Включает курсорную пагинацию, если в запросе передан cursor."""
+
+    @property
+    def paginator(self):
+        if (
+            not hasattr(self, '_paginator')
+            and KeysetCursorPagination.cursor_query_param
+            in self.request.query_params
+            and not issubclass(self.pagination_class, KeysetCursorPagination)
+        ):
+            self._paginator = KeysetCursorPagination()
+        return super().paginator
@@ -0,0 +1,88 @@
+"""Чтение GET-запросов API с реплик и закрепление за основной базой.
+
+После успешной записи пользователь на DB_REPLICA_PIN_SECONDS читает
+только с основной базы, чтобы не увидеть устаревших данных из-за
+задержки репликации. Закрепление хранится в cookie и в кэше по
+пользователю, поэтому работает и для клиентов с токеном без cookie.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram.routers import get_replicas, replica_reads
+
+
+PIN_COOKIE = 'db_primary'
+
+
+def pin_key(user_id):
+    return f'db_primary:{user_id}'
+
+
+def is_pinned(request):
+    if PIN_COOKIE in request.COOKIES:
+        return True
+    return request.user.is_authenticated and bool(
+        cache.get(pin_key(request.user.pk))
+    )
+
+
+def pin_to_primary(request, response):
+    """Закрепляет автора записи за основной базой на короткое время."""
+    seconds = settings.DB_REPLICA_PIN_SECONDS
+    response.set_cookie(
+        PIN_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax'
+    )
+    if request.user.is_authenticated:
+        cache.set(pin_key(request.user.pk), True, seconds)
+
+
+def is_settled(*versions):
+    """Видит ли реплика изменения с такими версиями.
+
+    При чтении с реплики свежие версии означают, что реплика ещё может
+    отдавать старые данные: такие ответы не кэшируются и не получают
+    ETag, иначе устаревшее содержимое закрепилось бы под новой версией.
+    """
+    if not replica_reads.get():
+        return True
+    border = time.time_ns() - settings.DB_REPLICA_PIN_SECONDS * 10 ** 9
+    return all(version < border for version in versions)
+
+
+class ReplicaReadMixin:
+    """Выполняет GET-запросы вьюсета на репликах.
+
+    Аутентификация и проверка прав проходят до переключения, поэтому
+    только что выданный токен ищется в основной базе.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        token = replica_reads.set(False)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            replica_reads.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and get_replicas()
+            and not is_pinned(request)
+        ):
+            replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and get_replicas()
+        ):
+            pin_to_primary(request, response)
+        return response
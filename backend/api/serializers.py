@@ -1,11 +1,19 @@
 import base64
+import binascii
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.shortcuts import get_object_or_404
+from django.core.cache import cache
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from recipes.images import IMAGE_VARIANTS
 from recipes.models import (
     Favorite,
     Ingredients,
@@ -20,8 +28,16 @@ from recipes.constants import (
     MIN_TIME_COOKING,
     MAX_TIME_COOKING,
 )
+from recipes.shopping import recipe_ingredients_changed
+from recipes.signals import (
+    recipe_ingredient_changed,
+    recipe_ingredient_totals_changed,
+    skip_receivers,
+)
+from recipes.versions import bump_object_version, get_versions, version_key
 from users.models import Follow
 from users.constants import PAGE_SIZE
+from .replicas import is_settled
 
 
 User = get_user_model()
@@ -30,15 +46,59 @@ User = get_user_model()
 class Base64ImageField(serializers.ImageField):
     """Сериализатор для фотографии в BASE64."""
 
+    default_error_messages = {
+        'invalid_base64': 'Некорректное изображение в формате base64.',
+        'too_large': 'Размер изображения не должен превышать {max_size} байт.',
+    }
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
+            try:
+                format, imgstr = data.split(';base64,')
+            except ValueError:
+                self.fail('invalid_base64')
             ext = format.split('/')[-1]
-
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            max_size = settings.IMAGE_UPLOAD_MAX_SIZE
+            if len(imgstr) * 3 // 4 > max_size:
+                self.fail('too_large', max_size=max_size)
+            try:
+                content = base64.b64decode(imgstr, validate=True)
+            except binascii.Error:
+                self.fail('invalid_base64')
+            data = ContentFile(content, name='temp.' + ext)
         return super().to_internal_value(data)
 
 
+class ImageVariantsField(serializers.Field):
+    """Ссылки на уменьшенные копии изображения.
+
+    Пока фоновая обработка текущего изображения не завершилась или
+    изображения нет, возвращает None.
+    """
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        image = getattr(instance, self.image_field)
+        value = getattr(instance, self.field_name)
+        if not image or not value or value.get('source') != image.name:
+            return None
+        request = self.context.get('request')
+        variants = {}
+        for variant_name in IMAGE_VARIANTS:
+            variants[variant_name] = {}
+            for file_format, path in value.get(variant_name, {}).items():
+                url = default_storage.url(path)
+                if request:
+                    url = request.build_absolute_uri(url)
+                variants[variant_name][file_format] = url
+        return variants
+
+
 class TagSerializer(serializers.ModelSerializer):
     """Сериализатор для тегов."""
 
@@ -92,6 +152,7 @@ class UserSerializer(serializers.ModelSerializer):
 
     is_subscribed = serializers.SerializerMethodField()
     avatar = Base64ImageField(required=False)
+    avatar_variants = ImageVariantsField('avatar')
 
     class Meta:
         model = User
@@ -102,13 +163,16 @@ class UserSerializer(serializers.ModelSerializer):
             'first_name',
             'last_name',
             'avatar',
+            'avatar_variants',
             'is_subscribed'
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.follower.filter(user=request.user).exists()
+            return obj.following.filter(user=request.user).exists()
         return False
 
 
@@ -176,10 +240,11 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для краткой записий рецепта."""
 
     image = Base64ImageField()
+    image_variants = ImageVariantsField('image')
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
 
 
 class FollowDetailSerializer(serializers.ModelSerializer):
@@ -209,26 +274,36 @@ class FollowDetailSerializer(serializers.ModelSerializer):
             'avatar',
         )
 
+    @staticmethod
+    def get_recipes_limit(request):
+        try:
+            return max(
+                int(request.GET.get('recipes_limit', PAGE_SIZE)),
+                0
+            )
+        except ValueError:
+            return PAGE_SIZE
+
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        return user.following.filter(
-            following=obj.following
-        ).exists()
+        return obj.user_id == self.context.get('request').user.id
 
     def get_recipes(self, obj):
         request = self.context.get('request')
-        limit = request.GET.get('recipes_limit', PAGE_SIZE)
-        try:
-            limit = int(limit)
-        except ValueError:
-            pass
+        if hasattr(obj, 'author_recipes'):
+            recipes = obj.author_recipes
+        else:
+            recipes = obj.following.recipes.all()[
+                :self.get_recipes_limit(request)
+            ]
         return ShortRecipeSerializer(
-            obj.following.recipes.all()[:limit],
+            recipes,
             many=True,
             context={'request': request},
         ).data
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.following.recipes.all().count()
 
 
@@ -337,48 +412,36 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
         return data
 
 
-class DownloadShoppingCartSerializer(serializers.ModelSerializer):
-    """Сериализатор для скачивание список покупок."""
+class RecipeBatchSerializer(serializers.Serializer):
+    """Сериализатор списка рецептов для пакетных операций."""
 
-    ingredients = serializers.SerializerMethodField()
-    user = serializers.SlugRelatedField(
-        read_only=True,
-        default=serializers.CurrentUserDefault(),
-        slug_field='username'
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.RECIPE_BATCH_MAX_SIZE,
     )
 
-    class Meta:
-        model = ShoppingList
-        fields = ('id', 'user', 'ingredients')
+    def validate_recipes(self, value):
+        """Убирает повторы, сохраняя порядок."""
+        return list(dict.fromkeys(value))
 
-    def get_ingredients(self, obj):
-        recipes = obj.recipe.all()
-        ingredient_dict = {}
-        for recipe in recipes:
-            for recipe_ingredient in recipe.recipe_ingredients.all():
-                ingredient = recipe_ingredient.ingredient
-                key = (
-                    ingredient.id,
-                    ingredient.name,
-                    ingredient.measurement_unit
-                )
-                if key in ingredient_dict:
-                    ingredient_dict[key] += recipe_ingredient.amount
-                else:
-                    ingredient_dict[key] = recipe_ingredient.amount
-        return [
-            {
-                'id': key[0],
-                'name': key[1],
-                'measurement_unit': key[2],
-                'amount': amount
-            }
-            for key, amount in ingredient_dict.items()
-        ]
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Сериализатор списка рецептов с пакетным чтением кэша."""
+
+    def to_representation(self, data):
+        return self.child.to_representation_many(list(
+            data.all() if hasattr(data, 'all') else data
+        ))
 
 
 class RecipeReadSerializer(serializers.ModelSerializer):
-    """Сериализатор для вывода рецептов."""
+    """Сериализатор для вывода рецептов.
+
+    Общая для всех пользователей часть рецепта кэшируется целиком,
+    поверх неё при ответе проставляются is_favorited, is_in_shopping_cart
+    и author.is_subscribed текущего пользователя.
+    """
 
     author = UserSerializer(read_only=True)
     ingredients = RecipeIngredientReadSerializer(
@@ -387,6 +450,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     )
     tags = TagSerializer(read_only=True, many=True)
     image = Base64ImageField(required=True, allow_null=True)
+    image_variants = ImageVariantsField('image')
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -399,11 +463,13 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'is_favorited',
             'is_in_shopping_cart',
             'image',
+            'image_variants',
             'text',
             'ingredients',
             'tags',
             'cooking_time',
         )
+        list_serializer_class = RecipeListSerializer
 
     def check_user_status(self, obj, model):
         user = self.context.get('request')
@@ -417,11 +483,86 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         )
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return self.check_user_status(obj, Favorite)
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return self.check_user_status(obj, ShoppingList)
 
+    def to_representation(self, instance):
+        return self.to_representation_many([instance])[0]
+
+    def render(self, instance):
+        return super().to_representation(instance)
+
+    def get_fragment_keys(self, recipes, request):
+        versions = get_versions(
+            [version_key(Tag), version_key(Ingredients)]
+            + [version_key(Recipe, recipe.pk) for recipe in recipes]
+            + [version_key(User, recipe.author_id) for recipe in recipes]
+        )
+        shared = (
+            f'{request.scheme}://{request.get_host()}:'
+            f'{versions[version_key(Tag)]}:'
+            f'{versions[version_key(Ingredients)]}'
+        )
+        keys = {}
+        for recipe in recipes:
+            recipe_versions = (
+                versions[version_key(Tag)],
+                versions[version_key(Ingredients)],
+                versions[version_key(Recipe, recipe.pk)],
+                versions[version_key(User, recipe.author_id)],
+            )
+            keys[recipe.pk] = (
+                f'recipe_fragment:{shared}:{recipe.pk}:'
+                f'{recipe_versions[2]}:{recipe_versions[3]}'
+                if is_settled(*recipe_versions) else None
+            )
+        return keys
+
+    def to_representation_many(self, recipes):
+        for recipe in recipes:
+            if hasattr(recipe, 'author_is_subscribed'):
+                recipe.author.is_subscribed = recipe.author_is_subscribed
+        request = self.context.get('request')
+        if request is None:
+            prefetch_related_objects(recipes, *Recipe.read_prefetches())
+            return [self.render(recipe) for recipe in recipes]
+        keys = self.get_fragment_keys(recipes, request)
+        cached = cache.get_many([key for key in keys.values() if key])
+        fragments = {
+            pk: cached[key] for pk, key in keys.items() if key in cached
+        }
+        missing = [recipe for recipe in recipes if recipe.pk not in fragments]
+        if missing:
+            prefetch_related_objects(missing, *Recipe.read_prefetches())
+            rendered = {recipe.pk: self.render(recipe) for recipe in missing}
+            cache.set_many(
+                {
+                    keys[pk]: data for pk, data in rendered.items()
+                    if keys[pk]
+                },
+                settings.RECIPE_CACHE_TIMEOUT,
+            )
+            fragments.update(rendered)
+        author_field = self.fields['author']
+        representations = []
+        for recipe in recipes:
+            data = fragments[recipe.pk]
+            data['is_favorited'] = self.get_is_favorited(recipe)
+            data['is_in_shopping_cart'] = self.get_is_in_shopping_cart(
+                recipe
+            )
+            data['author']['is_subscribed'] = author_field.get_is_subscribed(
+                recipe.author
+            )
+            representations.append(data)
+        return representations
+
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
     """Сериализатор для изменения рецептов."""
@@ -500,6 +641,11 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             for ingredient_data in ingredients_data
         ]
         RecipeIngredient.objects.bulk_create(ingredients_to_create)
+        bump_object_version(Recipe, instance.pk)
+        recipe_ingredients_changed(
+            instance.pk,
+            [ingredient_data['id'] for ingredient_data in ingredients_data]
+        )
 
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
@@ -510,15 +656,96 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         self.create_recipe_ingredients_bulk(recipe, ingredients_data)
         return recipe
 
+    @staticmethod
+    def set_prefetched(instance, name, objects):
+        """Кладёт объекты в кэш prefetch, чтобы ответ не читал их заново."""
+        queryset = getattr(instance, name).all()
+        queryset._result_cache = list(objects)
+        queryset._prefetch_done = True
+        if not hasattr(instance, '_prefetched_objects_cache'):
+            instance._prefetched_objects_cache = {}
+        instance._prefetched_objects_cache[name] = queryset
+
+    def update_tags(self, instance, tags):
+        current = set(instance.tags.values_list('id', flat=True))
+        removed = current - {tag.pk for tag in tags}
+        added = [tag for tag in tags if tag.pk not in current]
+        if removed:
+            instance.tags.remove(*removed)
+        if added:
+            instance.tags.add(*added)
+        self.set_prefetched(
+            instance, 'tags', sorted(tags, key=lambda tag: -tag.pk)
+        )
+
+    def update_recipe_ingredients(self, instance, ingredients_data):
+        """Приводит ингредиенты рецепта к переданным.
+
+        Меняются только строки с другим количеством, удаляются лишние
+        строки (включая повторы одного ингредиента), создаются новые.
+        bulk_update и bulk_create не вызывают сигналов, а при удалении
+        построчные обработчики пропускаются, поэтому кэш рецепта и итоги
+        списков покупок пересчитываются здесь один раз.
+        """
+        amounts = {item['id']: item['amount'] for item in ingredients_data}
+        kept, removed = {}, {}
+        for row in instance.recipe_ingredients.select_related('ingredient'):
+            if row.ingredient_id in amounts and row.ingredient_id not in kept:
+                kept[row.ingredient_id] = row
+            else:
+                removed[row.pk] = row.ingredient_id
+        changed = [
+            row for ingredient_id, row in kept.items()
+            if row.amount != amounts[ingredient_id]
+        ]
+        for row in changed:
+            row.amount = amounts[row.ingredient_id]
+        added_ids = [
+            ingredient_id for ingredient_id in amounts
+            if ingredient_id not in kept
+        ]
+        ingredients = (
+            Ingredients.objects.in_bulk(added_ids) if added_ids else {}
+        )
+        added = [
+            RecipeIngredient(
+                recipe=instance,
+                ingredient=ingredients[ingredient_id],
+                amount=amounts[ingredient_id],
+            )
+            for ingredient_id in added_ids
+        ]
+        if removed:
+            with skip_receivers(
+                recipe_ingredient_changed, recipe_ingredient_totals_changed
+            ):
+                RecipeIngredient.objects.filter(pk__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        if added:
+            RecipeIngredient.objects.bulk_create(added)
+        changed_ids = {*removed.values(), *added_ids}
+        changed_ids.update(row.ingredient_id for row in changed)
+        if changed_ids:
+            bump_object_version(Recipe, instance.pk)
+            recipe_ingredients_changed(instance.pk, changed_ids)
+        self.set_prefetched(
+            instance,
+            'recipe_ingredients',
+            added[::-1] + sorted(
+                kept.values(), key=lambda row: row.pk, reverse=True
+            ),
+        )
+
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop('ingredients', None)
         tags_data = validated_data.pop('tags', None)
-        instance = super().update(instance, validated_data)
-        if tags_data is not None:
-            instance.tags.set(tags_data)
-        if ingredients_data is not None:
-            instance.ingredients.clear()
-            self.create_recipe_ingredients_bulk(instance, ingredients_data)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if tags_data is not None:
+                self.update_tags(instance, tags_data)
+            if ingredients_data is not None:
+                self.update_recipe_ingredients(instance, ingredients_data)
         return instance
 
     def to_representation(self, instance):
@@ -0,0 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import revoke_cached_tokens, token_cache_key
+
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Отзывает закэшированный токен при выходе из системы."""
+    cache.delete(token_cache_key(instance.key))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """Сбрасывает закэшированного пользователя после изменений."""
+    if not created:
+        revoke_cached_tokens(instance.pk)
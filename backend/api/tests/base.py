@@ -0,0 +1,44 @@
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from benchmarks.dataset import DatasetSize, seed
+
+
+class SeededAPITestCase(APITestCase):
+    """Тесты API на небольшом наборе данных бенчмарка."""
+
+    size = DatasetSize(
+        users=6,
+        recipes_per_user=4,
+        ingredients=30,
+        ingredients_per_recipe=3,
+        tags=3,
+        favorites_per_user=5,
+        cart_per_user=3,
+        follows_per_user=3,
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(
+            MEDIA_ROOT=media_root, IMAGE_VARIANT_WORKERS=0
+        )
+        media.enable()
+        cls.addClassCleanup(media.disable)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed(cls.size)
+
+    def setUp(self):
+        cache.clear()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.dataset.token}'
+        )
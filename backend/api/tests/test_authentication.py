@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+
+from api.authentication import (
+    CACHED_USER_FIELDS,
+    CachedTokenAuthentication,
+    token_cache_key,
+)
+from benchmarks.dataset import PASSWORD
+from .base import SeededAPITestCase
+
+
+User = get_user_model()
+
+
+class CachedTokenAuthenticationTests(SeededAPITestCase):
+
+    def authenticate(self):
+        return CachedTokenAuthentication().authenticate_credentials(
+            self.dataset.token
+        )[0]
+
+    def test_cached_user_is_served_without_queries(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual(user.pk, self.dataset.viewer.pk)
+        self.assertEqual(user.email, self.dataset.viewer.email)
+
+    def test_password_is_not_cached(self):
+        self.authenticate()
+        fields = cache.get(token_cache_key(self.dataset.token))
+        self.assertEqual(set(fields), set(CACHED_USER_FIELDS))
+        self.assertNotIn('password', fields)
+
+    def test_fields_updated_without_save_are_read_from_database(self):
+        viewer = self.dataset.viewer
+        viewer.avatar.save('avatar.png', ContentFile(b'png'))
+        self.client.get('/api/users/me/')
+        User.objects.filter(pk=viewer.pk).update(avatar_variants={
+            'source': viewer.avatar.name,
+            'thumbnail': {'jpeg': 'users/avatars/variants/a.jpeg'},
+        })
+        variants = self.client.get('/api/users/me/').data['avatar_variants']
+        self.assertTrue(
+            variants['thumbnail']['jpeg'].endswith('variants/a.jpeg')
+        )
+
+    def test_password_check_reads_database(self):
+        self.authenticate()
+        user = self.authenticate()
+        self.assertTrue(user.check_password(PASSWORD))
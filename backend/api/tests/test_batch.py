@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.bulk import insert_ignoring_conflicts
+from recipes.counters import find_mismatches
+from recipes.models import Favorite, Recipe
+from .base import SeededAPITestCase
+
+
+class FavoriteBatchTests(SeededAPITestCase):
+
+    def add_favorites(self, count):
+        recipe_ids = list(
+            Recipe.objects.exclude(favorite__user=self.dataset.viewer)
+            .order_by('id').values_list('id', flat=True)[:count]
+        )
+        response = self.client.post(
+            '/api/recipes/favorite/batch/',
+            {'recipes': recipe_ids},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        return recipe_ids
+
+    def remove_favorites(self, recipe_ids):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(
+                '/api/recipes/favorite/batch/',
+                {'recipes': recipe_ids},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(
+            result['success'] for result in response.data['results']
+        ))
+        return len(queries)
+
+    def test_delete_query_count_does_not_depend_on_batch_size(self):
+        small = self.remove_favorites(self.add_favorites(2))
+        large = self.remove_favorites(self.add_favorites(8))
+        self.assertEqual(small, large)
+
+    def test_delete_keeps_counters(self):
+        recipe_ids = self.add_favorites(5)
+        self.remove_favorites(recipe_ids)
+        self.assertFalse(Favorite.objects.filter(
+            user=self.dataset.viewer, recipe_id__in=recipe_ids
+        ).exists())
+        self.assertEqual(find_mismatches(self.dataset.recipe_ids), [])
+
+    def test_delete_skips_recipes_not_in_favorites(self):
+        recipe_ids = self.add_favorites(2)
+        self.remove_favorites(recipe_ids[:1])
+        response = self.client.delete(
+            '/api/recipes/favorite/batch/',
+            {'recipes': recipe_ids},
+            format='json',
+        )
+        self.assertEqual(
+            [result['success'] for result in response.data['results']],
+            [False, True],
+        )
+        self.assertEqual(find_mismatches(self.dataset.recipe_ids), [])
+
+    def test_add_counts_only_inserted_favorites(self):
+        recipe_ids = list(
+            Recipe.objects.exclude(favorite__user=self.dataset.viewer)
+            .order_by('id').values_list('id', flat=True)[:3]
+        )
+
+        def insert_after_concurrent_request(*args, **kwargs):
+            Favorite.objects.create(
+                user=self.dataset.viewer, recipe_id=recipe_ids[0]
+            )
+            return insert_ignoring_conflicts(*args, **kwargs)
+
+        with mock.patch(
+            'api.views.insert_ignoring_conflicts',
+            insert_after_concurrent_request,
+        ):
+            response = self.client.post(
+                '/api/recipes/favorite/batch/',
+                {'recipes': recipe_ids},
+                format='json',
+            )
+        self.assertEqual(
+            [result['success'] for result in response.data['results']],
+            [False, True, True],
+        )
+        self.assertEqual(find_mismatches(self.dataset.recipe_ids), [])
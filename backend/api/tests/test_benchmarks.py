@@ -0,0 +1,22 @@
+from api.urls import router_urls
+from benchmarks.runner import ScenarioRunner, build_scenarios
+from .base import SeededAPITestCase
+
+
+class ScenarioTests(SeededAPITestCase):
+
+    def test_scenarios_cover_every_api_route(self):
+        runner = ScenarioRunner(self.dataset)
+        routes = set()
+        for scenario in build_scenarios(self.dataset):
+            with self.subTest(scenario=scenario.name):
+                (response, _), _ = runner.run_once(
+                    scenario, lambda call: (call(), None)
+                )
+                self.assertLess(response.status_code, 400)
+                routes.add(response.resolver_match.url_name)
+        expected = {
+            pattern.name for pattern in router_urls
+            if pattern.name != 'api-root'
+        } | {'login', 'logout'}
+        self.assertEqual(expected - routes, set())
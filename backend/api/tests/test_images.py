@@ -0,0 +1,66 @@
+import base64
+from io import BytesIO
+
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from .base import SeededAPITestCase
+
+
+def make_image(color):
+    buffer = BytesIO()
+    Image.new('RGB', (400, 300), color).save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class AvatarVariantsTests(SeededAPITestCase):
+
+    def upload_avatar(self, color):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                '/api/users/me/avatar/',
+                {'avatar': make_image(color)},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.dataset.viewer.refresh_from_db()
+        return self.dataset.viewer
+
+    def get_variants(self):
+        return self.client.get('/api/users/me/').data['avatar_variants']
+
+    def test_variants_are_built_for_uploaded_avatar(self):
+        user = self.upload_avatar('red')
+        self.assertEqual(user.avatar_variants['source'], user.avatar.name)
+        self.assertEqual(
+            set(self.get_variants()), {'thumbnail', 'card', 'full'}
+        )
+
+    def test_deleted_avatar_clears_variants(self):
+        variants = self.upload_avatar('red').avatar_variants
+        paths = [
+            path for name, formats in variants.items() if name != 'source'
+            for path in formats.values()
+        ]
+        self.assertTrue(paths)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete('/api/users/me/avatar/')
+        self.assertEqual(response.status_code, 204)
+        self.dataset.viewer.refresh_from_db()
+        self.assertEqual(self.dataset.viewer.avatar_variants, {})
+        self.assertFalse(any(map(default_storage.exists, paths)))
+        self.assertIsNone(self.get_variants())
+
+    def test_variants_of_previous_avatar_are_not_returned(self):
+        user = self.upload_avatar('red')
+        with self.captureOnCommitCallbacks(execute=False):
+            self.client.put(
+                '/api/users/me/avatar/',
+                {'avatar': make_image('blue')},
+                format='json',
+            )
+        user.refresh_from_db()
+        self.assertNotEqual(user.avatar_variants['source'], user.avatar.name)
+        self.assertIsNone(self.get_variants())
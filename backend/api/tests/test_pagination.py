@@ -0,0 +1,97 @@
+from unittest import skipUnless
+
+from django.db import connection
+
+from recipes.models import Recipe
+from .base import SeededAPITestCase
+
+
+TIED_RECIPES = 1130
+
+
+class KeysetCursorPaginationTests(SeededAPITestCase):
+
+    def test_exact_count(self):
+        response = self.client.get(
+            '/api/recipes/', {'cursor': '', 'count': 'exact'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], Recipe.objects.count())
+
+    def test_count_is_omitted_by_default(self):
+        response = self.client.get('/api/recipes/', {'cursor': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.data)
+
+    @skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+    def test_estimated_count(self):
+        response = self.client.get(
+            '/api/recipes/', {'cursor': '', 'count': 'estimate'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data['count'], int)
+        self.assertGreaterEqual(response.data['count'], 0)
+
+
+class CompositeKeysetTests(SeededAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        recipe = Recipe.objects.get(pk=cls.dataset.own_recipe_id)
+        Recipe.objects.bulk_create([
+            Recipe(
+                author=recipe.author,
+                name=f'Без избранного {number}',
+                text=recipe.text,
+                image=recipe.image.name,
+                cooking_time=recipe.cooking_time,
+            )
+            for number in range(TIED_RECIPES)
+        ])
+
+    def walk(self, params):
+        pages = []
+        response = self.client.get('/api/recipes/', params)
+        for _ in range(Recipe.objects.count() // params['limit'] + 1):
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data['results'])
+            if not response.data['next']:
+                return pages
+            response = self.client.get(response.data['next'])
+        self.fail('Курсор не дошёл до последней страницы.')
+
+    def test_ties_beyond_offset_cutoff_are_reached(self):
+        self.assertGreater(
+            Recipe.objects.filter(favorites_count=0).count(), 1000
+        )
+        pages = self.walk(
+            {'ordering': '-favorites_count', 'cursor': '', 'limit': 100}
+        )
+        ids = [recipe['id'] for page in pages for recipe in page]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(
+            ids,
+            list(
+                Recipe.objects.order_by('-favorites_count', '-id')
+                .values_list('id', flat=True)
+            ),
+        )
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get(
+            '/api/recipes/',
+            {'ordering': 'favorites_count', 'cursor': '', 'limit': 100},
+        ).data
+        second = self.client.get(first['next']).data
+        third = self.client.get(second['next']).data
+        self.assertEqual(
+            self.client.get(third['previous']).data['results'],
+            second['results'],
+        )
+
+    def test_invalid_position_is_rejected(self):
+        response = self.client.get(
+            '/api/recipes/', {'cursor': 'cD1ub3QranNvbg=='}
+        )
+        self.assertEqual(response.status_code, 404)
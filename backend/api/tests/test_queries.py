@@ -0,0 +1,93 @@
+from django.core.cache import cache
+
+from recipes.models import Ingredients, Recipe, RecipeIngredient, Tag
+from .base import SeededAPITestCase
+
+
+class ReadQueriesTests(SeededAPITestCase):
+    """Число запросов чтения не зависит от размера страницы."""
+
+    def assertQueries(self, expected, url, params=None):
+        cache.clear()
+        with self.assertNumQueries(expected):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_recipe_list(self):
+        for limit in (2, 10):
+            with self.subTest(limit=limit):
+                data = self.assertQueries(
+                    4, '/api/recipes/', {'cursor': '', 'limit': limit}
+                )
+                self.assertEqual(len(data['results']), limit)
+        for page in (1, 2):
+            with self.subTest(page=page):
+                self.assertQueries(5, '/api/recipes/', {'page': page})
+
+    def test_recipe_list_anonymous(self):
+        self.client.credentials()
+        for limit in (2, 10):
+            with self.subTest(limit=limit):
+                self.assertQueries(
+                    3, '/api/recipes/', {'cursor': '', 'limit': limit}
+                )
+
+    def test_recipe_detail(self):
+        recipe_id = self.dataset.foreign_recipe_id
+        url = f'/api/recipes/{recipe_id}/'
+        data = self.assertQueries(5, url)
+        self.assertEqual(len(data['ingredients']), 3)
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(
+                recipe_id=recipe_id, ingredient_id=ingredient_id, amount=1
+            )
+            for ingredient_id in Ingredients.objects.exclude(
+                recipeingredient__recipe_id=recipe_id
+            ).values_list('id', flat=True)[:10]
+        ])
+        Recipe.objects.get(id=recipe_id).tags.set(self.dataset.tag_ids)
+        data = self.assertQueries(5, url)
+        self.assertEqual(len(data['ingredients']), 13)
+
+    def test_user_list(self):
+        for limit in (2, 5):
+            with self.subTest(limit=limit):
+                data = self.assertQueries(3, '/api/users/', {'limit': limit})
+                self.assertEqual(len(data['results']), limit)
+
+    def test_subscriptions(self):
+        for limit in (1, 3):
+            with self.subTest(limit=limit):
+                data = self.assertQueries(
+                    4,
+                    '/api/users/subscriptions/',
+                    {'limit': limit, 'recipes_limit': limit},
+                )
+                self.assertEqual(len(data['results']), limit)
+                self.assertTrue(all(
+                    len(author['recipes']) == limit
+                    for author in data['results']
+                ))
+
+    def test_tags(self):
+        self.assertEqual(len(self.assertQueries(2, '/api/tags/')), 3)
+        Tag.objects.bulk_create([
+            Tag(name=f'Новый тег {number}', slug=f'extra-tag-{number}')
+            for number in range(10)
+        ])
+        self.assertEqual(len(self.assertQueries(2, '/api/tags/')), 13)
+
+    def test_ingredients(self):
+        self.assertEqual(len(self.assertQueries(2, '/api/ingredients/')), 30)
+        Ingredients.objects.bulk_create([
+            Ingredients(name=f'добавка {number}', measurement_unit='г')
+            for number in range(20)
+        ])
+        self.assertEqual(len(self.assertQueries(2, '/api/ingredients/')), 50)
+        self.assertEqual(
+            len(self.assertQueries(
+                2, '/api/ingredients/', {'name': 'добавка'}
+            )),
+            20,
+        )
@@ -0,0 +1,90 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.dataset import IMAGE_DATA_URI
+from recipes.models import Ingredients, Recipe, ShoppingList
+from recipes.shopping import find_mismatches
+from .base import SeededAPITestCase
+
+
+class RecipeIngredientsUpdateTests(SeededAPITestCase):
+    """Изменение ингредиентов рецепта по разнице с текущими."""
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = Recipe.objects.get(id=self.dataset.own_recipe_id)
+        for shopping_list in ShoppingList.objects.all():
+            shopping_list.recipe.add(self.recipe)
+        self.current = list(
+            self.recipe.recipe_ingredients.values_list(
+                'ingredient_id', 'amount'
+            )
+        )
+        self.spare = list(
+            Ingredients.objects.exclude(
+                id__in=[ingredient_id for ingredient_id, _ in self.current]
+            ).values_list('id', flat=True)[:5]
+        )
+
+    def update(self, ingredients):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                f'/api/recipes/{self.recipe.pk}/',
+                {
+                    'name': self.recipe.name,
+                    'text': self.recipe.text,
+                    'cooking_time': self.recipe.cooking_time,
+                    'image': IMAGE_DATA_URI,
+                    'tags': self.dataset.tag_ids[:1],
+                    'ingredients': [
+                        {'id': ingredient_id, 'amount': amount}
+                        for ingredient_id, amount in ingredients
+                    ],
+                },
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            sorted(
+                (item['id'], item['amount'])
+                for item in response.data['ingredients']
+            ),
+            sorted(ingredients),
+        )
+        self.assertEqual(
+            sorted(self.recipe.recipe_ingredients.values_list(
+                'ingredient_id', 'amount'
+            )),
+            sorted(ingredients),
+        )
+        self.assertEqual(
+            find_mismatches(
+                list(ShoppingList.objects.values_list('id', flat=True))
+            ),
+            {},
+        )
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_diff_size(self):
+        self.update(self.current)
+        (first, amount), (second, _), _ = self.current
+        small = self.update([
+            (first, amount + 1), (second, 1), (self.spare[0], 2)
+        ])
+        large = self.update(
+            [(first, amount + 2)]
+            + [(ingredient, 3) for ingredient in self.spare[1:]]
+        )
+        self.assertEqual(small, large)
+
+    def test_unchanged_ingredients_keep_rows(self):
+        rows = list(self.recipe.recipe_ingredients.values_list(
+            'id', flat=True
+        ))
+        self.update(self.current)
+        self.assertEqual(
+            sorted(self.recipe.recipe_ingredients.values_list(
+                'id', flat=True
+            )),
+            sorted(rows),
+        )
@@ -0,0 +1,127 @@
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITransactionTestCase
+
+from api.async_views import run_in_pool
+from api.replicas import PIN_COOKIE
+from foodgram.routers import replica_reads
+from recipes.models import Recipe, Tag
+
+
+User = get_user_model()
+
+
+@override_settings(DB_REPLICA_ALIASES=['replica'])
+class ReplicaRequestTests(APITransactionTestCase):
+    """Маршрутизация запросов API между основной базой и репликой.
+
+    TestCase не подходит: внутри его транзакции роутер намеренно читает
+    только с основной базы.
+    """
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass'
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.user, name='Пирог', text='текст', cooking_time=5
+        )
+        Tag.objects.create(name='Завтрак', slug='breakfast')
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token ' + Token.objects.create(
+                user=self.user
+            ).key
+        )
+
+    def request(self, method, url):
+        with CaptureQueriesContext(connections['default']) as default:
+            with CaptureQueriesContext(connections['replica']) as replica:
+                response = getattr(self.client, method)(url)
+        self.assertLess(response.status_code, 400)
+        return response, len(default), len(replica)
+
+    def test_reads_go_to_replica(self):
+        response, _, replica = self.request('get', '/api/tags/')
+        self.assertEqual(len(response.data), 1)
+        self.assertGreater(replica, 0)
+        response, _, replica = self.request(
+            'get', f'/api/recipes/{self.recipe.pk}/'
+        )
+        self.assertEqual(response.data['name'], 'Пирог')
+        self.assertGreater(replica, 0)
+
+    def test_writes_go_to_default(self):
+        response, default, replica = self.request(
+            'post', f'/api/recipes/{self.recipe.pk}/favorite/'
+        )
+        self.assertGreater(default, 0)
+        self.assertEqual(replica, 0)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_reads_after_write_are_pinned_to_default(self):
+        self.request('post', f'/api/recipes/{self.recipe.pk}/favorite/')
+        response, _, replica = self.request(
+            'get', f'/api/recipes/{self.recipe.pk}/'
+        )
+        self.assertTrue(response.data['is_favorited'])
+        self.assertEqual(replica, 0)
+        self.client.cookies.clear()
+        _, _, replica = self.request('get', '/api/recipes/')
+        self.assertEqual(replica, 0)
+
+    def test_pin_ends_with_window(self):
+        self.request('post', f'/api/recipes/{self.recipe.pk}/favorite/')
+        self.client.cookies.clear()
+        cache.clear()
+        _, _, replica = self.request('get', '/api/recipes/')
+        self.assertGreater(replica, 0)
+
+
+@override_settings(DB_REPLICA_ALIASES=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.token = replica_reads.set(True)
+        self.addCleanup(replica_reads.reset, self.token)
+
+    def test_reads_without_flag_stay_on_default(self):
+        replica_reads.set(False)
+        self.assertEqual(router.db_for_read(Tag), 'default')
+
+    def test_reads_with_flag_go_to_replica(self):
+        self.assertEqual(router.db_for_read(Tag), 'replica')
+        self.assertEqual(router.db_for_write(Tag), 'default')
+
+    @override_settings(DB_REPLICA_ALIASES=[])
+    def test_reads_without_replicas_stay_on_default(self):
+        self.assertEqual(router.db_for_read(Tag), 'default')
+
+    def test_flag_carries_across_sync_to_async(self):
+        async def read():
+            return await sync_to_async(router.db_for_read)(Tag)
+
+        self.assertEqual(async_to_sync(read)(), 'replica')
+
+    def test_flag_carries_into_async_view_pool(self):
+        async def read():
+            return await run_in_pool(router.db_for_read, Tag)
+
+        self.assertEqual(async_to_sync(read)(), 'replica')
+
+
+@override_settings(DB_REPLICA_ALIASES=['replica'])
+class ReplicaTransactionTests(TestCase):
+
+    def test_reads_in_transaction_stay_on_default(self):
+        token = replica_reads.set(True)
+        self.addCleanup(replica_reads.reset, token)
+        with transaction.atomic():
+            self.assertEqual(router.db_for_read(Tag), 'default')
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
+from api.async_views import async_view
 from api.views import (
     IngredientsViewSet,
     RecipeViewSet,
@@ -16,8 +18,13 @@ router.register(r'ingredients', IngredientsViewSet)
 router.register(r'recipes', RecipeViewSet)
 router.register(r'users', UserViewSet, basename='users')
 
+router_urls = router.urls
+if settings.ASYNC_VIEWS:
+    for pattern in router_urls:
+        pattern.callback = async_view(pattern.callback)
+
 urlpatterns = [
-    path('', include(router.urls)),
+    path('', include(router_urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
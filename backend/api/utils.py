@@ -0,0 +1,59 @@
+import csv
+import json
+
+
+class Echo:
+    """Буфер для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def shopping_list_txt(ingredients):
+    """Построчно формирует список покупок в текстовом виде."""
+    yield 'Список покупок:\n\n'
+    for ingredient in ingredients:
+        yield (
+            f"{ingredient['ingredient__name']} — "
+            f"{ingredient['total_amount']} "
+            f"{ingredient['ingredient__measurement_unit']}\n"
+        )
+
+
+def shopping_list_csv(ingredients):
+    """Построчно формирует список покупок в формате CSV."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for ingredient in ingredients:
+        yield writer.writerow((
+            ingredient['ingredient__name'],
+            ingredient['total_amount'],
+            ingredient['ingredient__measurement_unit'],
+        ))
+
+
+def shopping_list_json(ingredients):
+    """Построчно формирует список покупок в формате JSON."""
+    yield '['
+    separator = ''
+    for ingredient in ingredients:
+        yield separator + json.dumps(
+            {
+                'id': ingredient['ingredient_id'],
+                'name': ingredient['ingredient__name'],
+                'measurement_unit': ingredient[
+                    'ingredient__measurement_unit'
+                ],
+                'amount': ingredient['total_amount'],
+            },
+            ensure_ascii=False
+        )
+        separator = ','
+    yield ']'
+
+
+SHOPPING_LIST_FORMATS = {
+    'txt': (shopping_list_txt, 'text/plain; charset=utf-8'),
+    'csv': (shopping_list_csv, 'text/csv; charset=utf-8'),
+    'json': (shopping_list_json, 'application/json; charset=utf-8'),
+}
@@ -1,25 +1,82 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import (
+    BooleanField,
+    Count,
+    Exists,
+    F,
+    OuterRef,
+    Value,
+)
+from django.http import Http404, HttpResponseRedirect, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from django.shortcuts import get_object_or_404, redirect
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
 from django.views import View
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .filters import IngredientFilter, RecipeFilter
+from .authentication import revoke_cached_tokens
+from .conditional import (
+    recipe_etag,
+    recipe_last_modified,
+    table_etag,
+    table_last_modified,
+)
+from .filters import (
+    IngredientFilter,
+    RecipeFilter,
+    RecipeOrderingFilter,
+)
+from .pagination import (
+    CursorPaginationMixin,
+    FeedCursorPagination,
+    TrendingCursorPagination,
+)
 from .persmissions import IsAdminAuthorOrReadOnly
-from recipes.models import Favorite, Ingredients, Recipe, ShoppingList, Tag
+from .replicas import ReplicaReadMixin, is_settled
+from recipes.bulk import insert_ignoring_conflicts
+from recipes.counters import FAVORITES, change_counter
+from recipes.feed import get_feed_recipe_ids
+import recipes.constants as constants
+from recipes.models import (
+    Favorite,
+    Ingredients,
+    Recipe,
+    ShoppingList,
+    Tag,
+    TrendingRecipe,
+)
+from recipes.search import ingredient_index
+from recipes.signals import (
+    favorite_removed,
+    skip_receivers,
+    user_state_changed,
+)
+from recipes.shortlinks import resolve_short_id
+from recipes.versions import (
+    bump_user_state_version,
+    get_versions,
+    version_key,
+)
+from users.models import Follow
 from .serializers import (
     AvatarSerializer,
-    DownloadShoppingCartSerializer,
     FavoriteSerializer,
     FollowDetailSerializer,
     FollowSerializer,
     IngredientsSerializer,
     PasswordChangeSerializer,
+    RecipeBatchSerializer,
     RecipeReadSerializer,
     RecipeWriteSerializer,
     ShortRecipeSerializer,
@@ -29,12 +86,21 @@ from .serializers import (
     UserSerializer,
     UserRegistrationSerializer,
 )
+from .utils import SHOPPING_LIST_FORMATS
 
 
 User = get_user_model()
 
 
-class TagViewSet(viewsets.ModelViewSet):
+@method_decorator(
+    condition(table_etag(Tag), table_last_modified(Tag)),
+    name='list'
+)
+@method_decorator(
+    condition(table_etag(Tag), table_last_modified(Tag)),
+    name='retrieve'
+)
+class TagViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """Вьюсет для тегов."""
 
     queryset = Tag.objects.all()
@@ -43,7 +109,21 @@ class TagViewSet(viewsets.ModelViewSet):
     http_method_names = ['get']
 
 
-class IngredientsViewSet(viewsets.ModelViewSet):
+@method_decorator(
+    condition(
+        table_etag(Ingredients),
+        table_last_modified(Ingredients)
+    ),
+    name='list'
+)
+@method_decorator(
+    condition(
+        table_etag(Ingredients),
+        table_last_modified(Ingredients)
+    ),
+    name='retrieve'
+)
+class IngredientsViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """Вьюсет для ингредиентами ."""
 
     queryset = Ingredients.objects.all()
@@ -53,19 +133,45 @@ class IngredientsViewSet(viewsets.ModelViewSet):
     filter_backends = (IngredientFilter,)
     search_fields = ('^name',)
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get(IngredientFilter.search_param)
+        if not name:
+            return super().list(request, *args, **kwargs)
+        return Response(
+            ingredient_index.search(name, settings.INGREDIENTS_SEARCH_LIMIT)
+        )
+
 
-class RecipeViewSet(viewsets.ModelViewSet):
+@method_decorator(
+    condition(recipe_etag, recipe_last_modified),
+    name='retrieve'
+)
+@method_decorator(vary_on_headers('Authorization'), name='retrieve')
+class RecipeViewSet(
+    ReplicaReadMixin, CursorPaginationMixin, viewsets.ModelViewSet
+):
     """Вьюсет для рецептов."""
 
     queryset = Recipe.objects.all()
     http_method_names = ['get', 'post', 'patch', 'delete']
     permission_classes = [IsAdminAuthorOrReadOnly]
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, RecipeOrderingFilter)
     pagination_class = PageNumberPagination
     filterset_class = RecipeFilter
+    ordering_fields = ('favorites_count', 'in_carts_count')
+
+    def get_queryset(self):
+        queryset = super().get_queryset().defer('search_vector')
+        if self.action in ('list', 'retrieve', 'trending', 'feed'):
+            queryset = queryset.select_related('author').with_user_flags(
+                self.request.user
+            )
+        elif self.action == 'partial_update':
+            queryset = queryset.select_related('author')
+        return queryset
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'trending', 'feed'):
             return RecipeReadSerializer
         return RecipeWriteSerializer
 
@@ -88,6 +194,66 @@ class RecipeViewSet(viewsets.ModelViewSet):
         read_serializer = RecipeReadSerializer(instance)
         return Response(read_serializer.data)
 
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='trending',
+        filter_backends=(DjangoFilterBackend,),
+        pagination_class=TrendingCursorPagination,
+    )
+    def trending(self, request):
+        """Популярные рецепты из рейтинга команды update_trending.
+
+        Ответы анонимным пользователям кэшируются до пересчёта рейтинга,
+        но не дольше TRENDING_CACHE_TIMEOUT.
+        """
+        cache_key = None
+        if not request.user.is_authenticated:
+            key = version_key(TrendingRecipe)
+            version = get_versions([key])[key]
+            cache_key = (
+                f'trending:{version}:{request.build_absolute_uri()}'
+            )
+            data = cache.get(cache_key)
+            if data is not None:
+                return Response(data)
+            if not is_settled(version):
+                cache_key = None
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            trending__score__gte=constants.TRENDING_MIN_SCORE
+        ).annotate(trending_score=F('trending__score'))
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        if cache_key:
+            cache.set(
+                cache_key, response.data, settings.TRENDING_CACHE_TIMEOUT
+            )
+        return response
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='feed',
+        permission_classes=[IsAuthenticated],
+        filter_backends=(),
+        pagination_class=FeedCursorPagination,
+    )
+    def feed(self, request):
+        """Рецепты авторов, на которых подписан пользователь."""
+        paginator = self.paginator
+        cursor = paginator.decode_cursor(request)
+        recipe_ids = get_feed_recipe_ids(
+            request.user.id,
+            cursor.position if cursor else None,
+            paginator.get_page_size(request) + 1,
+        )
+        page = self.paginate_queryset(
+            self.get_queryset().filter(id__in=recipe_ids)
+        )
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(
         detail=True,
         methods=['post', 'delete'],
@@ -125,6 +291,114 @@ class RecipeViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
+    def get_batch_recipes(self, request, selected):
+        """Рецепты из тела запроса и признак selected одним запросом."""
+        serializer = RecipeBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        recipes = Recipe.objects.filter(id__in=recipe_ids).annotate(
+            is_selected=Exists(selected)
+        )
+        return recipe_ids, {recipe.id: recipe for recipe in recipes}
+
+    def batch_response(self, recipe_ids, recipes, changed, error):
+        """Результат пакетной операции для каждого рецепта."""
+        results = []
+        for recipe_id in recipe_ids:
+            result = {'id': recipe_id, 'success': recipe_id in changed}
+            if recipe_id not in recipes:
+                result['error'] = 'Рецепт не найден'
+            elif recipe_id not in changed:
+                result['error'] = error
+            elif self.request.method == 'POST':
+                result['recipe'] = ShortRecipeSerializer(
+                    recipes[recipe_id],
+                    context={'request': self.request}
+                ).data
+            results.append(result)
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='favorite/batch',
+        permission_classes=[IsAuthenticated],
+    )
+    def favorite_batch(self, request):
+        """POST: добавление списка рецептов в избранное. DELETE: удаление."""
+        recipe_ids, recipes = self.get_batch_recipes(
+            request,
+            Favorite.objects.filter(user=request.user, recipe=OuterRef('pk'))
+        )
+        adding = request.method == 'POST'
+        changed = {
+            recipe_id for recipe_id, recipe in recipes.items()
+            if recipe.is_selected != adding
+        }
+        if adding:
+            if changed:
+                with transaction.atomic():
+                    changed = set(insert_ignoring_conflicts(
+                        Favorite,
+                        [
+                            Favorite(user=request.user, recipe_id=recipe_id)
+                            for recipe_id in changed
+                        ],
+                        'recipe',
+                    ))
+                    change_counter(FAVORITES, changed, 1)
+                bump_user_state_version(request.user.id)
+        elif changed:
+            with transaction.atomic():
+                favorites = Favorite.objects.select_for_update().filter(
+                    user=request.user, recipe_id__in=changed
+                )
+                changed = set(favorites.values_list('recipe_id', flat=True))
+                with skip_receivers(favorite_removed, user_state_changed):
+                    favorites.delete()
+                change_counter(FAVORITES, changed, -1)
+            bump_user_state_version(request.user.id)
+        return self.batch_response(
+            recipe_ids,
+            recipes,
+            changed,
+            'Рецепт уже в избранном' if adding else 'Рецепта нет в избранном',
+        )
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='shopping_cart/batch',
+        permission_classes=[IsAuthenticated],
+    )
+    def shopping_cart_batch(self, request):
+        """POST: добавление списка рецептов в покупки. DELETE: удаление."""
+        shopping_list, _ = ShoppingList.objects.get_or_create(
+            user=request.user
+        )
+        recipe_ids, recipes = self.get_batch_recipes(
+            request,
+            ShoppingList.recipe.through.objects.filter(
+                shoppinglist=shopping_list, recipe=OuterRef('pk')
+            )
+        )
+        adding = request.method == 'POST'
+        changed = {
+            recipe_id for recipe_id, recipe in recipes.items()
+            if recipe.is_selected != adding
+        }
+        if adding and changed:
+            shopping_list.recipe.add(*changed)
+        elif changed:
+            shopping_list.recipe.remove(*changed)
+        return self.batch_response(
+            recipe_ids,
+            recipes,
+            changed,
+            'Рецепт уже в списке покупок!' if adding
+            else 'Рецепта нет в списке покупок',
+        )
+
     @action(
         detail=False,
         methods=['get'],
@@ -132,18 +406,24 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated]
     )
     def download_shopping_cart(self, request):
-        """Скачивание списка покупок."""
+        """Скачивание списка покупок в формате txt, csv или json."""
         shopping_list = get_object_or_404(ShoppingList, user=request.user)
-        serializer = DownloadShoppingCartSerializer(shopping_list)
-        text_content = "Список покупок:\n\n"
-        setting_response = 'attachment; filename="shopping_list.txt"'
-        for ingredient in serializer.data['ingredients']:
-            text_content += (
-                f"{ingredient['name']} — "
-                f"{ingredient['amount']} {ingredient['measurement_unit']}\n"
+        file_format = request.query_params.get('filetype', 'txt')
+        if file_format not in SHOPPING_LIST_FORMATS:
+            return Response(
+                {"error": "Поддерживаемые форматы: "
+                          f"{', '.join(SHOPPING_LIST_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        response = HttpResponse(text_content, content_type='text/plain')
-        response['Content-Disposition'] = setting_response
+        render, content_type = SHOPPING_LIST_FORMATS[file_format]
+        ingredients = shopping_list.get_ingredient_totals().iterator()
+        response = StreamingHttpResponse(
+            render(ingredients),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{file_format}"'
+        )
         return response
 
     @action(detail=True, methods=['get'], url_path='get-link')
@@ -180,7 +460,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(
+    ReplicaReadMixin, CursorPaginationMixin, viewsets.ModelViewSet
+):
     """Вьюсет для работы с пользователями и подписками."""
 
     queryset = User.objects.all()
@@ -188,8 +470,21 @@ class UserViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         if self.action == 'subscriptions':
-            return self.request.user.follower.all()
-        return super().get_queryset()
+            return self.request.user.follower.select_related(
+                'following'
+            ).annotate(recipes_count=Count('following__recipes'))
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            user = self.request.user
+            if user.is_authenticated:
+                is_subscribed = Exists(Follow.objects.filter(
+                    user=user,
+                    following=OuterRef('pk')
+                ))
+            else:
+                is_subscribed = Value(False, output_field=BooleanField())
+            queryset = queryset.annotate(is_subscribed=is_subscribed)
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -218,6 +513,7 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         request.user.set_password(serializer.validated_data['new_password'])
         request.user.save()
+        revoke_cached_tokens(request.user.pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -251,7 +547,15 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     def subscriptions(self, request):
         """Получение всех подписок."""
-        pages = self.paginate_queryset(request.user.follower.all())
+        pages = self.paginate_queryset(self.get_queryset())
+        recipes = defaultdict(list)
+        for recipe in Recipe.objects.latest_by_authors(
+            [follow.following_id for follow in pages],
+            FollowDetailSerializer.get_recipes_limit(request)
+        ):
+            recipes[recipe.author_id].append(recipe)
+        for follow in pages:
+            follow.author_recipes = recipes[follow.following_id]
         serializer = FollowDetailSerializer(
             pages,
             many=True,
@@ -292,5 +596,7 @@ class ShortLinkRedirectView(View):
     """VeiwSet для редирект по короткой ссылки."""
 
     def get(self, request, short_id):
-        recipe = get_object_or_404(Recipe, short_id=short_id)
-        return redirect(f'/recipes/{recipe.id}/')
+        recipe_id = resolve_short_id(short_id)
+        if recipe_id is None:
+            raise Http404('Рецепт не найден.')
+        return HttpResponseRedirect(f'/recipes/{recipe_id}/')
@@ -0,0 +1,271 @@
+import base64
+import random
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from rest_framework.authtoken.models import Token
+
+from recipes.models import (
+    Favorite,
+    Ingredients,
+    Recipe,
+    RecipeIngredient,
+    ShoppingList,
+    Tag,
+)
+import recipes.constants as constants
+from recipes.counters import reconcile
+from recipes.feed import rebuild as rebuild_feed
+from recipes.shopping import refresh_totals
+from recipes.trending import update_scores
+from users.models import Follow
+
+
+User = get_user_model()
+
+PASSWORD = 'Bench-Password-1'
+IMAGE_BASE64 = (
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwAD'
+    'hgGAWjR9awAAAABJRU5ErkJggg=='
+)
+IMAGE_DATA_URI = f'data:image/png;base64,{IMAGE_BASE64}'
+BATCH_SIZE = 1000
+RECIPE_BATCH_SIZE = 10
+
+
+@dataclass
+class DatasetSize:
+    """Размер тестового набора данных."""
+
+    users: int = 50
+    recipes_per_user: int = 10
+    ingredients: int = 500
+    ingredients_per_recipe: int = 8
+    tags: int = 6
+    favorites_per_user: int = 20
+    cart_per_user: int = 10
+    follows_per_user: int = 10
+
+
+@dataclass
+class Dataset:
+    """Объекты, на которые ссылаются сценарии бенчмарка."""
+
+    size: DatasetSize
+    viewer: object = None
+    token: str = ''
+    recipe_ids: list = field(default_factory=list)
+    own_recipe_id: int = None
+    foreign_recipe_id: int = None
+    batch_recipe_ids: list = field(default_factory=list)
+    author_id: int = None
+    unfollowed_author_id: int = None
+    ingredient_ids: list = field(default_factory=list)
+    tag_ids: list = field(default_factory=list)
+    short_id: str = ''
+
+
+def sample_follows(rng, user_id, user_ids, count, excluded=None):
+    candidates = [
+        author for author in user_ids
+        if author != user_id and author != excluded
+    ]
+    return rng.sample(candidates, min(count, len(candidates)))
+
+
+def seed(size, random_seed=0):
+    """Создаёт детерминированный набор данных и возвращает Dataset.
+
+    Одинаковые size и random_seed дают одинаковые данные, поэтому
+    результаты разных коммитов можно сравнивать между собой.
+    """
+    rng = random.Random(random_seed)
+    image = default_storage.save(
+        'recipe/images/benchmark.png',
+        ContentFile(base64.b64decode(IMAGE_BASE64)),
+    )
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        [
+            User(
+                username=f'bench_user_{number}',
+                email=f'bench_user_{number}@example.com',
+                first_name=f'Имя {number}',
+                last_name=f'Фамилия {number}',
+                password=password,
+            )
+            for number in range(size.users)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith='bench_user_')
+        .order_by('id').values_list('id', flat=True)
+    )
+    Tag.objects.bulk_create([
+        Tag(name=f'Тег {number}', slug=f'bench-tag-{number}')
+        for number in range(size.tags)
+    ])
+    tag_ids = list(
+        Tag.objects.filter(slug__startswith='bench-tag-')
+        .order_by('id').values_list('id', flat=True)
+    )
+    Ingredients.objects.bulk_create(
+        [
+            Ingredients(
+                name=f'ингредиент {number:05d}',
+                measurement_unit=rng.choice(('г', 'мл', 'шт.')),
+            )
+            for number in range(size.ingredients)
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    ingredient_ids = list(
+        Ingredients.objects.filter(name__startswith='ингредиент ')
+        .order_by('id').values_list('id', flat=True)
+    )
+    Recipe.objects.bulk_create(
+        [
+            Recipe(
+                author_id=author_id,
+                name=f'Рецепт {index}',
+                text='Описание рецепта для бенчмарка. ' * 10,
+                image=image,
+                cooking_time=rng.randint(5, 180),
+                short_id=f'b{index:x}',
+            )
+            for index, author_id in enumerate(
+                author_id
+                for author_id in user_ids
+                for _ in range(size.recipes_per_user)
+            )
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    recipes = list(
+        Recipe.objects.filter(author_id__in=user_ids)
+        .order_by('id').values_list('id', 'author_id')
+    )
+    recipe_ids = [recipe_id for recipe_id, _ in recipes]
+    RecipeIngredient.objects.bulk_create(
+        [
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in rng.sample(
+                ingredient_ids,
+                min(size.ingredients_per_recipe, len(ingredient_ids))
+            )
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    Recipe.tags.through.objects.bulk_create(
+        [
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in rng.sample(tag_ids, min(2, len(tag_ids)))
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    Favorite.objects.bulk_create(
+        [
+            Favorite(user_id=user_id, recipe_id=recipe_id)
+            for user_id in user_ids
+            for recipe_id in rng.sample(
+                recipe_ids, min(size.favorites_per_user, len(recipe_ids))
+            )
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    ShoppingList.objects.bulk_create(
+        [ShoppingList(user_id=user_id) for user_id in user_ids],
+        batch_size=BATCH_SIZE,
+    )
+    shopping_lists = dict(
+        ShoppingList.objects.filter(user_id__in=user_ids)
+        .values_list('user_id', 'id')
+    )
+    ShoppingList.recipe.through.objects.bulk_create(
+        [
+            ShoppingList.recipe.through(
+                shoppinglist_id=shopping_lists[user_id],
+                recipe_id=recipe_id,
+            )
+            for user_id in user_ids
+            for recipe_id in rng.sample(
+                recipe_ids, min(size.cart_per_user, len(recipe_ids))
+            )
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    refresh_totals(list(shopping_lists.values()))
+    reconcile(recipe_ids)
+    update_scores(
+        half_life=timedelta(hours=constants.TRENDING_HALF_LIFE_HOURS),
+        favorite_weight=constants.TRENDING_FAVORITE_WEIGHT,
+        cart_weight=constants.TRENDING_CART_WEIGHT,
+        min_score=constants.TRENDING_MIN_SCORE,
+        batch_size=BATCH_SIZE,
+    )
+    viewer_id = user_ids[0]
+    authors = [user_id for user_id in user_ids if user_id != viewer_id]
+    Follow.objects.bulk_create(
+        [
+            Follow(user_id=user_id, following_id=following_id)
+            for user_id in user_ids
+            for following_id in sample_follows(
+                rng, user_id, user_ids, size.follows_per_user,
+                excluded=authors[-1] if user_id == viewer_id else None,
+            )
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    for user_id in user_ids:
+        rebuild_feed(user_id)
+    viewer = User.objects.get(id=viewer_id)
+    followed = set(
+        Follow.objects.filter(user_id=viewer_id)
+        .values_list('following_id', flat=True)
+    )
+    unfollowed = [author for author in authors if author not in followed]
+    own_recipe_id = next(
+        recipe_id for recipe_id, author_id in recipes
+        if author_id == viewer_id
+    )
+    favorited = set(
+        Favorite.objects.filter(user_id=viewer_id)
+        .values_list('recipe_id', flat=True)
+    )
+    in_cart = set(
+        ShoppingList.recipe.through.objects.filter(
+            shoppinglist_id=shopping_lists[viewer_id]
+        ).values_list('recipe_id', flat=True)
+    )
+    foreign_recipe_ids = [
+        recipe_id for recipe_id, author_id in recipes
+        if author_id != viewer_id
+        and recipe_id not in favorited
+        and recipe_id not in in_cart
+    ]
+    return Dataset(
+        size=size,
+        viewer=viewer,
+        token=Token.objects.create(user=viewer).key,
+        recipe_ids=recipe_ids,
+        own_recipe_id=own_recipe_id,
+        foreign_recipe_id=foreign_recipe_ids[0],
+        batch_recipe_ids=foreign_recipe_ids[1:RECIPE_BATCH_SIZE + 1],
+        author_id=authors[0],
+        unfollowed_author_id=unfollowed[0],
+        ingredient_ids=ingredient_ids,
+        tag_ids=tag_ids,
+        short_id=Recipe.objects.get(id=recipe_ids[0]).short_id,
+    )
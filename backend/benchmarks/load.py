@@ -0,0 +1,169 @@
+"""Нагрузочное сравнение режимов WSGI и ASGI.
+
+Сервер запускается тем же gunicorn.conf.py, что и в Dockerfile, и
+нагружается параллельными клиентами с keep-alive. Медленные клиенты
+держат открытые соединения и передают заголовки по одному в
+интервал, как клиенты на плохой сети без буферизующего прокси. Если
+включён QUERY_INSTRUMENTATION, в результат попадает доля запросов,
+обошедшихся без нового соединения с БД.
+"""
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .runner import percentile
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(process, port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            socket.create_connection(('127.0.0.1', port), 1).close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+@contextmanager
+def serve(mode, workers, cwd, startup_timeout=30):
+    """Запускает gunicorn в режиме mode и возвращает его порт."""
+    port = get_free_port()
+    with tempfile.TemporaryFile() as log:
+        process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn',
+                '--config', 'gunicorn.conf.py',
+                '--bind', f'127.0.0.1:{port}',
+            ],
+            cwd=cwd,
+            env={
+                **os.environ,
+                'SERVER_MODE': mode,
+                'GUNICORN_WORKERS': str(workers),
+            },
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        try:
+            if not wait_for_port(process, port, startup_timeout):
+                log.seek(0)
+                raise RuntimeError(
+                    f'gunicorn в режиме {mode} не запустился:\n'
+                    + log.read().decode(errors='replace')[-2000:]
+                )
+            yield port
+        finally:
+            process.terminate()
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+def hold_slow_client(port, stop, interval):
+    """Держит соединение, отправляя заголовки запроса по одному."""
+    try:
+        with socket.create_connection(('127.0.0.1', port), 5) as sock:
+            sock.sendall(b'GET /api/tags/ HTTP/1.1\r\nHost: 127.0.0.1\r\n')
+            while not stop.wait(interval):
+                sock.sendall(b'X-Slow-Client: 1\r\n')
+    except OSError:
+        pass
+
+
+def run_client(port, paths, offset, deadline, timeout):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    timings, statuses, errors = [], {}, 0
+    reuse = None
+    number = offset
+    while time.monotonic() < deadline:
+        path = paths[number % len(paths)]
+        number += 1
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            continue
+        timings.append((time.perf_counter() - started) * 1000)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+        reuse = response.getheader('X-DB-Connection-Reuse', reuse)
+    connection.close()
+    return timings, statuses, errors, reuse
+
+
+def run_load(
+    port, paths, concurrency, duration, slow_clients=0,
+    slow_interval=1.0, timeout=10,
+):
+    """Нагружает сервер в течение duration секунд и возвращает метрики."""
+    stop = threading.Event()
+    holders = [
+        threading.Thread(
+            target=hold_slow_client,
+            args=(port, stop, slow_interval),
+            daemon=True,
+        )
+        for _ in range(slow_clients)
+    ]
+    for holder in holders:
+        holder.start()
+    try:
+        deadline = time.monotonic() + duration
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(
+                lambda offset: run_client(
+                    port, paths, offset, deadline, timeout
+                ),
+                range(concurrency),
+            ))
+    finally:
+        stop.set()
+    timings = [value for result in results for value in result[0]]
+    statuses = {}
+    for _, result_statuses, _, _ in results:
+        for code, count in result_statuses.items():
+            statuses[str(code)] = statuses.get(str(code), 0) + count
+    errors = sum(result[2] for result in results) + sum(
+        count for code, count in statuses.items() if int(code) >= 400
+    )
+    reuse = [float(result[3]) for result in results if result[3]]
+    if not timings:
+        return {'requests': 0, 'errors': errors, 'statuses': statuses}
+    return {
+        'requests': len(timings),
+        'rps': round(len(timings) / duration, 1),
+        'errors': errors,
+        'statuses': statuses,
+        'connection_reuse': (
+            round(statistics.mean(reuse), 3) if reuse else None
+        ),
+        'latency_ms': {
+            'p50': round(percentile(timings, 50), 3),
+            'p90': round(percentile(timings, 90), 3),
+            'p99': round(percentile(timings, 99), 3),
+            'mean': round(statistics.mean(timings), 3),
+            'max': round(max(timings), 3),
+        },
+    }
@@ -0,0 +1,61 @@
+import json
+
+from django.db import transaction
+
+
+class SelectCollector:
+    """Обёртка курсора, запоминающая выполненные SELECT-запросы."""
+
+    def __init__(self):
+        self.queries = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            self.queries.setdefault(sql, params)
+        return execute(sql, params, many, context)
+
+
+def explain(connection, sql, params, seqscan=False):
+    """План запроса из EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON).
+
+    Без seqscan планировщику запрещено выбирать Seq Scan, если есть
+    другой способ прочитать таблицу. На маленьком тестовом наборе
+    планировщик часто предпочитает полный проход по таблице даже при
+    наличии подходящего индекса, а так Seq Scan в плане означает, что
+    индекса нет.
+    """
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            if not seqscan:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(
+                'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + sql, params
+            )
+            plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def walk(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from walk(child)
+
+
+def find_problems(plan, max_rows, allowed_relations=()):
+    """Последовательные сканирования и узлы с оценкой больше max_rows."""
+    problems = []
+    for node in walk(plan):
+        relation = node.get('Relation Name')
+        title = node['Node Type'] + (f' по {relation}' if relation else '')
+        if node['Node Type'] == 'Seq Scan' and (
+            relation not in allowed_relations
+        ):
+            problems.append(title)
+        if node.get('Plan Rows', 0) > max_rows:
+            problems.append(
+                f"{title}: оценка {node['Plan Rows']} строк "
+                f"(фактически {node.get('Actual Rows', '?')})"
+            )
+    return problems
@@ -0,0 +1,446 @@
+import gc
+import json
+import math
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from .dataset import IMAGE_DATA_URI, PASSWORD
+
+
+ALTERNATE_PASSWORD = 'Bench-Password-2'
+
+
+@dataclass
+class Scenario:
+    """Один замеряемый запрос и подготовительные запросы вокруг него.
+
+    request, before и after принимают контекст итерации и возвращают
+    кортеж (метод, путь, данные). before и after не замеряются и нужны,
+    чтобы каждая итерация начиналась с одинакового состояния. token
+    возвращает по контексту токен замеряемого запроса, если он отличается
+    от токена набора данных.
+    """
+
+    name: str
+    request: object
+    before: object = None
+    after: object = None
+    auth: bool = True
+    token: object = None
+
+
+def get(path, params=None):
+    return lambda context: ('get', path, params)
+
+
+def recipe_payload(dataset, name='Рецепт из бенчмарка'):
+    return {
+        'name': name,
+        'text': 'Описание',
+        'cooking_time': 10,
+        'image': IMAGE_DATA_URI,
+        'tags': dataset.tag_ids[:2],
+        'ingredients': [
+            {'id': ingredient_id, 'amount': 10}
+            for ingredient_id in dataset.ingredient_ids[:5]
+        ],
+    }
+
+
+def build_scenarios(dataset):
+    """Сценарии для всех маршрутов api/urls.py и коротких ссылок."""
+    recipe = dataset.foreign_recipe_id
+    own_recipe = dataset.own_recipe_id
+    author = dataset.unfollowed_author_id
+    tag = dataset.tag_ids[0]
+    ingredient = dataset.ingredient_ids[0]
+
+    def batch(method, path):
+        return lambda context: (
+            method, path, {'recipes': dataset.batch_recipe_ids}
+        )
+
+    def login(context):
+        return ('post', '/api/auth/token/login/', {
+            'email': 'bench_user_1@example.com',
+            'password': PASSWORD,
+        })
+
+    def created_recipe_path(context):
+        return f"/api/recipes/{context['before'].json()['id']}/"
+
+    def password_change(context):
+        passwords = (PASSWORD, ALTERNATE_PASSWORD)
+        if context['iteration'] % 2:
+            passwords = passwords[::-1]
+        return ('post', '/api/users/set_password/', {
+            'current_password': passwords[0],
+            'new_password': passwords[1],
+        })
+
+    def registration(context):
+        number = context['iteration']
+        return ('post', '/api/users/', {
+            'email': f'bench_signup_{number}@example.com',
+            'username': f'bench_signup_{number}',
+            'first_name': 'Имя',
+            'last_name': 'Фамилия',
+            'password': PASSWORD,
+        })
+
+    return [
+        Scenario('tags.list', get('/api/tags/'), auth=False),
+        Scenario('tags.retrieve', get(f'/api/tags/{tag}/'), auth=False),
+        Scenario('ingredients.list', get('/api/ingredients/'), auth=False),
+        Scenario(
+            'ingredients.search',
+            get('/api/ingredients/', {'name': 'ингредиент 001'}),
+            auth=False,
+        ),
+        Scenario(
+            'ingredients.retrieve',
+            get(f'/api/ingredients/{ingredient}/'),
+            auth=False,
+        ),
+        Scenario(
+            'recipes.list.anonymous',
+            get('/api/recipes/', {'limit': 6}),
+            auth=False,
+        ),
+        Scenario('recipes.list', get('/api/recipes/', {'limit': 6})),
+        Scenario(
+            'recipes.list.deep_page',
+            get('/api/recipes/', {'limit': 6, 'page': max(
+                1, len(dataset.recipe_ids) // 6
+            )}),
+        ),
+        Scenario(
+            'recipes.trending.anonymous',
+            get('/api/recipes/trending/', {'limit': 6}),
+            auth=False,
+        ),
+        Scenario('recipes.trending', get('/api/recipes/trending/', {
+            'limit': 6
+        })),
+        Scenario('recipes.feed', get('/api/recipes/feed/', {'limit': 6})),
+        Scenario(
+            'recipes.list.cursor',
+            get('/api/recipes/', {'limit': 6, 'cursor': ''}),
+        ),
+        Scenario(
+            'recipes.list.filtered',
+            get('/api/recipes/', {
+                'limit': 6,
+                'is_favorited': 1,
+                'tags': 'bench-tag-0',
+            }),
+        ),
+        Scenario(
+            'recipes.list.author',
+            get('/api/recipes/', {'limit': 6, 'author': dataset.author_id}),
+        ),
+        Scenario('recipes.retrieve', get(f'/api/recipes/{recipe}/')),
+        Scenario(
+            'recipes.get_link',
+            get(f'/api/recipes/{recipe}/get-link/'),
+        ),
+        Scenario(
+            'recipes.create',
+            lambda context: (
+                'post', '/api/recipes/', recipe_payload(dataset)
+            ),
+            after=lambda context: (
+                'delete',
+                f"/api/recipes/{context['response'].json()['id']}/",
+                None,
+            ),
+        ),
+        Scenario(
+            'recipes.update',
+            lambda context: (
+                'patch',
+                f'/api/recipes/{own_recipe}/',
+                recipe_payload(
+                    dataset, f"Рецепт {context['iteration'] % 2}"
+                ),
+            ),
+        ),
+        Scenario(
+            'recipes.delete',
+            lambda context: ('delete', created_recipe_path(context), None),
+            before=lambda context: (
+                'post', '/api/recipes/', recipe_payload(dataset)
+            ),
+        ),
+        Scenario(
+            'recipes.favorite.add',
+            lambda context: (
+                'post', f'/api/recipes/{recipe}/favorite/', None
+            ),
+            after=lambda context: (
+                'delete', f'/api/recipes/{recipe}/favorite/', None
+            ),
+        ),
+        Scenario(
+            'recipes.favorite.remove',
+            lambda context: (
+                'delete', f'/api/recipes/{recipe}/favorite/', None
+            ),
+            before=lambda context: (
+                'post', f'/api/recipes/{recipe}/favorite/', None
+            ),
+        ),
+        Scenario(
+            'recipes.shopping_cart.add',
+            lambda context: (
+                'post', f'/api/recipes/{recipe}/shopping_cart/', None
+            ),
+            after=lambda context: (
+                'delete', f'/api/recipes/{recipe}/shopping_cart/', None
+            ),
+        ),
+        Scenario(
+            'recipes.shopping_cart.remove',
+            lambda context: (
+                'delete', f'/api/recipes/{recipe}/shopping_cart/', None
+            ),
+            before=lambda context: (
+                'post', f'/api/recipes/{recipe}/shopping_cart/', None
+            ),
+        ),
+        Scenario(
+            'recipes.favorite.batch.add',
+            batch('post', '/api/recipes/favorite/batch/'),
+            after=batch('delete', '/api/recipes/favorite/batch/'),
+        ),
+        Scenario(
+            'recipes.favorite.batch.remove',
+            batch('delete', '/api/recipes/favorite/batch/'),
+            before=batch('post', '/api/recipes/favorite/batch/'),
+        ),
+        Scenario(
+            'recipes.shopping_cart.batch.add',
+            batch('post', '/api/recipes/shopping_cart/batch/'),
+            after=batch('delete', '/api/recipes/shopping_cart/batch/'),
+        ),
+        Scenario(
+            'recipes.shopping_cart.batch.remove',
+            batch('delete', '/api/recipes/shopping_cart/batch/'),
+            before=batch('post', '/api/recipes/shopping_cart/batch/'),
+        ),
+        Scenario(
+            'recipes.download_shopping_cart.txt',
+            get('/api/recipes/download_shopping_cart/'),
+        ),
+        Scenario(
+            'recipes.download_shopping_cart.csv',
+            get('/api/recipes/download_shopping_cart/', {'filetype': 'csv'}),
+        ),
+        Scenario(
+            'recipes.download_shopping_cart.json',
+            get(
+                '/api/recipes/download_shopping_cart/',
+                {'filetype': 'json'}
+            ),
+        ),
+        Scenario('users.list', get('/api/users/', {'limit': 6})),
+        Scenario('users.retrieve', get(f'/api/users/{author}/')),
+        Scenario('users.me', get('/api/users/me/')),
+        Scenario('users.create', registration, auth=False),
+        Scenario('users.set_password', password_change),
+        Scenario(
+            'users.avatar.update',
+            lambda context: (
+                'put', '/api/users/me/avatar/', {'avatar': IMAGE_DATA_URI}
+            ),
+        ),
+        Scenario(
+            'users.avatar.delete',
+            lambda context: ('delete', '/api/users/me/avatar/', None),
+            before=lambda context: (
+                'put', '/api/users/me/avatar/', {'avatar': IMAGE_DATA_URI}
+            ),
+        ),
+        Scenario(
+            'users.subscriptions',
+            get('/api/users/subscriptions/', {
+                'limit': 6,
+                'recipes_limit': 3,
+            }),
+        ),
+        Scenario(
+            'users.subscribe',
+            lambda context: (
+                'post', f'/api/users/{author}/subscribe/', None
+            ),
+            after=lambda context: (
+                'delete', f'/api/users/{author}/subscribe/', None
+            ),
+        ),
+        Scenario(
+            'users.unsubscribe',
+            lambda context: (
+                'delete', f'/api/users/{author}/subscribe/', None
+            ),
+            before=lambda context: (
+                'post', f'/api/users/{author}/subscribe/', None
+            ),
+        ),
+        Scenario('auth.token.login', login, auth=False),
+        Scenario(
+            'auth.token.logout',
+            lambda context: ('post', '/api/auth/token/logout/', None),
+            before=login,
+            auth=False,
+            token=lambda context: context['before'].json()['auth_token'],
+        ),
+        Scenario(
+            'short_link.redirect',
+            get(f'/r/{dataset.short_id}/'),
+            auth=False,
+        ),
+    ]
+
+
+def send(client, request, headers):
+    method, path, data = request
+    if method == 'get':
+        response = client.get(path, data or {}, **headers)
+    else:
+        response = getattr(client, method)(
+            path,
+            data=json.dumps(data) if data is not None else None,
+            content_type='application/json',
+            **headers,
+        )
+    if response.streaming:
+        response.streamed_size = sum(map(len, response.streaming_content))
+    return response
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+class ScenarioRunner:
+    """Прогоняет сценарии через тестовый клиент Django и собирает метрики."""
+
+    def __init__(self, dataset, iterations=30, warmup=3, memory_iterations=3):
+        self.dataset = dataset
+        self.iterations = iterations
+        self.warmup = warmup
+        self.memory_iterations = memory_iterations
+        self.client = Client()
+        self.iteration = 0
+
+    def headers(self, scenario, context=None):
+        if scenario.token and context is not None:
+            token = scenario.token(context)
+        elif scenario.auth:
+            token = self.dataset.token
+        else:
+            return {}
+        return {'HTTP_AUTHORIZATION': f'Token {token}'}
+
+    def run_once(self, scenario, measure):
+        headers = self.headers(scenario)
+        context = {'iteration': self.iteration}
+        self.iteration += 1
+        if scenario.before:
+            context['before'] = send(
+                self.client, scenario.before(context), headers
+            )
+        request = scenario.request(context)
+        request_headers = self.headers(scenario, context)
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            result = measure(
+                lambda: send(self.client, request, request_headers)
+            )
+        context['response'] = result[0]
+        if scenario.after:
+            send(self.client, scenario.after(context), headers)
+        return result, len(queries)
+
+    @staticmethod
+    def timed(call):
+        started = time.perf_counter()
+        response = call()
+        return response, time.perf_counter() - started
+
+    @staticmethod
+    def traced(call):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            response = call()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return response, peak
+
+    def run_scenario(self, scenario):
+        for _ in range(self.warmup):
+            self.run_once(scenario, self.timed)
+        timings, query_counts, statuses = [], [], {}
+        for _ in range(self.iterations):
+            (response, elapsed), query_count = self.run_once(
+                scenario, self.timed
+            )
+            timings.append(elapsed * 1000)
+            query_counts.append(query_count)
+            statuses[response.status_code] = (
+                statuses.get(response.status_code, 0) + 1
+            )
+        memory = [
+            self.run_once(scenario, self.traced)[0][1]
+            for _ in range(self.memory_iterations)
+        ]
+        return {
+            'iterations': self.iterations,
+            'statuses': {str(code): count for code, count in statuses.items()},
+            'errors': sum(
+                count for code, count in statuses.items() if code >= 400
+            ),
+            'latency_ms': {
+                'p50': round(percentile(timings, 50), 3),
+                'p90': round(percentile(timings, 90), 3),
+                'p99': round(percentile(timings, 99), 3),
+                'mean': round(statistics.mean(timings), 3),
+                'max': round(max(timings), 3),
+            },
+            'queries': {
+                'median': statistics.median(query_counts),
+                'max': max(query_counts),
+            },
+            'memory_peak_kb': round(max(memory) / 1024, 1) if memory else None,
+        }
+
+
+def compare(current, baseline, threshold):
+    """Сравнивает результаты с эталоном и возвращает список регрессий."""
+    regressions = []
+    for name, result in current['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None:
+            continue
+        before = previous['latency_ms']['p50']
+        after = result['latency_ms']['p50']
+        if before and (after - before) / before > threshold:
+            regressions.append(
+                f'{name}: p50 {before:.2f} мс -> {after:.2f} мс'
+            )
+        if result['queries']['max'] > previous['queries']['max']:
+            regressions.append(
+                f"{name}: запросов {previous['queries']['max']} -> "
+                f"{result['queries']['max']}"
+            )
+    return regressions
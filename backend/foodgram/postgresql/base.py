@@ -0,0 +1,42 @@
+"""PostgreSQL с проверкой переиспользуемых соединений.
+
+Перенос CONN_HEALTH_CHECKS из Django 4.1. Постоянное соединение
+проверяется перед первым обращением к БД в каждом HTTP-запросе, и
+разорванное (перезапуск сервера, таймаут пулера) открывается заново, а не
+приводит к ошибке 500.
+"""
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_enabled = self.settings_dict.get(
+            'CONN_HEALTH_CHECKS', False
+        )
+        self.health_check_done = False
+
+    def connect(self):
+        self.health_check_done = True
+        super().connect()
+
+    def ensure_connection(self):
+        self.close_if_health_check_failed()
+        super().ensure_connection()
+
+    def close_if_health_check_failed(self):
+        if (
+            self.connection is None
+            or not self.health_check_enabled
+            or self.health_check_done
+            or self.in_atomic_block
+        ):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
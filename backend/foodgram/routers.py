@@ -0,0 +1,43 @@
+"""Маршрутизация чтения на реплики PostgreSQL.
+
+Реплики описываются настройкой DB_REPLICAS и получают псевдонимы
+replica_0, replica_1 и т. д. из DB_REPLICA_ALIASES. Чтение уходит на
+реплику только там, где код явно включил replica_reads (GET-запросы
+вьюсетов API), и только вне транзакции. Запись, select_for_update и
+get_or_create всегда идут на основную базу.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+replica_reads = ContextVar('replica_reads', default=False)
+
+
+def get_replicas():
+    return settings.DB_REPLICA_ALIASES
+
+
+class ReplicaRouter:
+    """Распределяет чтение по репликам, запись оставляет основной базе."""
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if (
+            replicas
+            and replica_reads.get()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
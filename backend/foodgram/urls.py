@@ -3,6 +3,7 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from api.async_views import short_link_redirect
 from api.views import ShortLinkRedirectView
 
 
@@ -11,7 +12,10 @@ urlpatterns = [
     path('api/', include('api.urls')),
     path(
         'r/<str:short_id>/',
-        ShortLinkRedirectView.as_view(),
+        (
+            short_link_redirect if settings.ASYNC_VIEWS
+            else ShortLinkRedirectView.as_view()
+        ),
         name='short-link'
     )
 ]
@@ -48,6 +48,8 @@ class RecipeAdmin(admin.ModelAdmin):
         'id',
         'author',
         'name',
+        'favorites_count',
+        'in_carts_count',
     )
     search_fields = ('name',)
     list_filter = ('author', 'tags')
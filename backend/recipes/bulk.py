@@ -0,0 +1,112 @@
+from itertools import islice
+
+from django.db import connections, transaction
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class CopyStream:
+    """Файловый объект для COPY, формирующий строки по мере чтения."""
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.buffer = ''
+        self.processed = 0
+
+    @staticmethod
+    def escape(value):
+        if value is None:
+            return '\\N'
+        return (
+            str(value).replace('\\', '\\\\')
+            .replace('\t', ' ')
+            .replace('\n', ' ')
+            .replace('\r', ' ')
+        )
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.processed += 1
+            self.buffer += '\t'.join(map(self.escape, row)) + '\n'
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def copy_objects(model, objects, using='default'):
+    """Вставляет несохранённые объекты модели через COPY (PostgreSQL).
+
+    Как и bulk_create, заполняет auto_now поля и не вызывает save() и
+    сигналы. Первичные ключи объектам не присваиваются.
+    """
+    connection = connections[using]
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    rows = (
+        [
+            field.get_db_prep_save(
+                field.pre_save(obj, add=True), connection
+            )
+            for field in fields
+        ]
+        for obj in objects
+    )
+    stream = CopyStream(rows)
+    columns = ', '.join(
+        connection.ops.quote_name(field.column) for field in fields
+    )
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.cursor.copy_expert(
+            f'COPY {connection.ops.quote_name(model._meta.db_table)} '
+            f'({columns}) FROM STDIN',
+            stream,
+        )
+    return stream.processed
+
+
+def insert_ignoring_conflicts(model, objects, returning, using='default'):
+    """Вставляет объекты, пропуская конфликтующие, и возвращает вставленные.
+
+    В отличие от bulk_create(ignore_conflicts=True) возвращает значения
+    поля returning только у строк, которые действительно вставил этот
+    запрос (INSERT ... ON CONFLICT DO NOTHING RETURNING, PostgreSQL и
+    SQLite 3.35+). Сигналы не вызываются.
+    """
+    objects = list(objects)
+    if not objects:
+        return []
+    connection = connections[using]
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    params = [
+        field.get_db_prep_save(field.pre_save(obj, add=True), connection)
+        for obj in objects
+        for field in fields
+    ]
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    row = '({})'.format(', '.join(['%s'] * len(fields)))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+            f'VALUES {", ".join([row] * len(objects))} '
+            f'ON CONFLICT DO NOTHING '
+            f'RETURNING {quote(model._meta.get_field(returning).column)}',
+            params,
+        )
+        return [value for value, in cursor.fetchall()]
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+LOCAL_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Версии кэша должны быть общими для всех воркеров gunicorn."""
+    return shared_cache_errors(settings.GUNICORN_WORKERS)
+
+
+def shared_cache_errors(workers):
+    """Ошибки конфигурации кэша для запуска workers воркеров gunicorn."""
+    backend = settings.CACHES['default']['BACKEND']
+    if workers > 1 and backend == LOCAL_CACHE:
+        return [
+            Error(
+                f'{backend} не разделяется между воркерами gunicorn: '
+                'изменения в одном процессе не сбросят кэш других.',
+                hint=(
+                    'Укажите общий кэш в CACHE_BACKEND или запустите '
+                    'один воркер (GUNICORN_WORKERS=1).'
+                ),
+                id='recipes.E001',
+            )
+        ]
+    return []
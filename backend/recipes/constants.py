@@ -4,3 +4,10 @@ MAX_LENGTH_SHORT_LINK = 10
 MIN_TIME_COOKING = 1
 MAX_TIME_COOKING = 32000
 MAX_LENGTH_NAME_RECIPE = 256
+SHORT_ID_LENGTH = 6
+SHORT_ID_ATTEMPTS = 10
+SEARCH_CONFIG = 'russian'
+TRENDING_HALF_LIFE_HOURS = 72
+TRENDING_FAVORITE_WEIGHT = 1.0
+TRENDING_CART_WEIGHT = 0.5
+TRENDING_MIN_SCORE = 0.01
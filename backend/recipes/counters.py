@@ -0,0 +1,85 @@
+"""Счётчики добавлений рецепта в избранное и списки покупок.
+
+Счётчики меняются сигналами через F(), поэтому одновременные запросы не
+теряют изменений. Массовые вставки сигналы обходят, после них счётчики
+пересчитываются командой reconcile_recipe_counters.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Favorite, Recipe, ShoppingList
+
+
+FAVORITES = 'favorites_count'
+IN_CARTS = 'in_carts_count'
+
+
+def change_counter(field, recipe_ids, delta):
+    """Изменяет счётчик рецептов на delta одним UPDATE."""
+    if not recipe_ids or not delta:
+        return
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
+
+
+def count_by_recipe(queryset):
+    return Coalesce(
+        Subquery(
+            queryset.filter(recipe=OuterRef('pk')).order_by()
+            .values('recipe').annotate(total=Count('*')).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def expected_counters():
+    return {
+        FAVORITES: count_by_recipe(Favorite.objects.all()),
+        IN_CARTS: count_by_recipe(ShoppingList.recipe.through.objects.all()),
+    }
+
+
+def find_mismatches(recipe_ids):
+    """Рецепты, у которых счётчики расходятся с таблицами связей."""
+    return list(
+        Recipe.objects.filter(pk__in=recipe_ids)
+        .annotate(**{
+            f'expected_{field}': expression
+            for field, expression in expected_counters().items()
+        })
+        .exclude(
+            favorites_count=F(f'expected_{FAVORITES}'),
+            in_carts_count=F(f'expected_{IN_CARTS}'),
+        )
+        .values_list(
+            'id',
+            FAVORITES,
+            f'expected_{FAVORITES}',
+            IN_CARTS,
+            f'expected_{IN_CARTS}',
+        )
+        .order_by('id')
+    )
+
+
+def reconcile(recipe_ids):
+    """Пересчитывает счётчики рецептов по таблицам связей."""
+    return Recipe.objects.filter(pk__in=recipe_ids).update(
+        **expected_counters()
+    )
+
+
+def iter_recipe_ids(batch_size):
+    """Идентификаторы рецептов пачками по batch_size."""
+    last_id = 0
+    while True:
+        batch = list(
+            Recipe.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
@@ -0,0 +1,161 @@
+"""Лента рецептов авторов, на которых подписан пользователь.
+
+Новый рецепт пачками записывается в TimelineEntry каждого подписчика
+автора, поэтому чтение ленты — выборка по индексу одной таблицы. Для
+авторов, у которых подписчиков больше FEED_FANOUT_LIMIT, записи не
+создаются: такие рецепты помечаются fanned_out=False и подмешиваются в
+ленту при чтении, даже если автор потом перестал быть популярным.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .bulk import batched
+from .models import Recipe, TimelineEntry
+from users.models import Follow
+
+
+POPULAR_AUTHORS_KEY = 'feed:popular_authors'
+UNFANNED_AUTHORS_KEY = 'feed:unfanned_authors'
+
+
+def get_popular_author_ids():
+    """Авторы, новые рецепты которых не рассылаются по лентам."""
+    author_ids = cache.get(POPULAR_AUTHORS_KEY)
+    if author_ids is None:
+        author_ids = frozenset(
+            Follow.objects.order_by().values('following')
+            .annotate(followers=Count('id'))
+            .filter(followers__gt=settings.FEED_FANOUT_LIMIT)
+            .values_list('following', flat=True)
+        )
+        cache.set(
+            POPULAR_AUTHORS_KEY,
+            author_ids,
+            settings.FEED_POPULAR_CACHE_TIMEOUT,
+        )
+    return author_ids
+
+
+def get_unfanned_author_ids():
+    """Авторы, у которых есть рецепты, не разосланные по лентам."""
+    author_ids = cache.get(UNFANNED_AUTHORS_KEY)
+    if author_ids is None:
+        author_ids = frozenset(
+            Recipe.objects.filter(fanned_out=False).order_by()
+            .values_list('author_id', flat=True).distinct()
+        )
+        cache.set(
+            UNFANNED_AUTHORS_KEY,
+            author_ids,
+            settings.FEED_POPULAR_CACHE_TIMEOUT,
+        )
+    return author_ids
+
+
+def iter_follower_ids(author_id, batch_size):
+    """Подписчики автора пачками по batch_size."""
+    queryset = Follow.objects.filter(following_id=author_id).order_by(
+        'user_id'
+    )
+    last_id = 0
+    while True:
+        batch = list(
+            queryset.filter(user_id__gt=last_id)
+            .values_list('user_id', flat=True)[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
+
+
+def fan_out(recipe_id, author_id):
+    """Добавляет рецепт в ленты подписчиков автора."""
+    if author_id in get_popular_author_ids():
+        Recipe.objects.filter(pk=recipe_id).update(fanned_out=False)
+        if author_id not in get_unfanned_author_ids():
+            cache.delete(UNFANNED_AUTHORS_KEY)
+        return
+    for batch in iter_follower_ids(
+        author_id, settings.FEED_FANOUT_BATCH_SIZE
+    ):
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    user_id=user_id, recipe_id=recipe_id, author_id=author_id
+                )
+                for user_id in batch
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def backfill(user_id, author_ids):
+    """Добавляет в ленту последние рецепты авторов после подписки.
+
+    Рецепты популярных авторов тоже записываются: иначе рецепты, разосланные
+    до того, как автор стал популярным, не попали бы в ленту нового
+    подписчика.
+    """
+    entries = [
+        TimelineEntry(
+            user_id=user_id, recipe_id=recipe.pk, author_id=recipe.author_id
+        )
+        for recipe in Recipe.objects.latest_by_authors(
+            author_ids, settings.FEED_BACKFILL_SIZE
+        )
+    ]
+    for batch in batched(entries, settings.FEED_FANOUT_BATCH_SIZE):
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты рецепты автора после отписки."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild(user_id):
+    """Заново собирает ленту пользователя по его подпискам."""
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    backfill(
+        user_id,
+        list(
+            Follow.objects.filter(user_id=user_id).values_list(
+                'following_id', flat=True
+            )
+        ),
+    )
+
+
+def get_feed_recipe_ids(user_id, before, limit):
+    """Первые limit рецептов ленты с id меньше before.
+
+    Записи ленты объединяются с неразосланными рецептами авторов, на
+    которых подписан пользователь; каждая из выборок идёт по своему
+    индексу.
+    """
+    timeline = TimelineEntry.objects.filter(user_id=user_id)
+    if before is not None:
+        timeline = timeline.filter(recipe_id__lt=before)
+    recipe_ids = set(
+        timeline.order_by('-recipe_id')
+        .values_list('recipe_id', flat=True)[:limit]
+    )
+    unfanned = get_unfanned_author_ids()
+    if unfanned:
+        authors = list(
+            Follow.objects.filter(
+                user_id=user_id, following_id__in=unfanned
+            ).values_list('following_id', flat=True)
+        )
+        if authors:
+            recipes = Recipe.objects.filter(
+                author_id__in=authors, fanned_out=False
+            )
+            if before is not None:
+                recipes = recipes.filter(id__lt=before)
+            recipe_ids.update(
+                recipes.order_by('-id').values_list('id', flat=True)[:limit]
+            )
+    return sorted(recipe_ids, reverse=True)[:limit]
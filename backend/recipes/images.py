@@ -0,0 +1,146 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, features
+
+from .versions import bump_object_version
+
+
+logger = logging.getLogger(__name__)
+
+IMAGE_VARIANTS = {
+    'thumbnail': (160, 160),
+    'card': (480, 480),
+    'full': (1280, 1280),
+}
+IMAGE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+
+
+def get_available_formats():
+    """Форматы, которые поддерживает установленная сборка Pillow."""
+    return [
+        name for name in IMAGE_FORMATS
+        if name != 'webp' or features.check('webp')
+    ]
+
+
+def render_variant(image, size, file_format):
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    if file_format == 'jpeg' and variant.mode != 'RGB':
+        background = Image.new('RGB', variant.size, (255, 255, 255))
+        if variant.mode in ('RGBA', 'LA', 'P'):
+            variant = variant.convert('RGBA')
+            background.paste(variant, mask=variant.getchannel('A'))
+        else:
+            background.paste(variant.convert('RGB'))
+        variant = background
+    pil_format, options = IMAGE_FORMATS[file_format]
+    buffer = BytesIO()
+    variant.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def generate_variants(name):
+    """Создаёт уменьшенные копии изображения и возвращает пути к ним."""
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    with default_storage.open(name) as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image.load()
+    variants = {'source': name}
+    for variant_name, size in IMAGE_VARIANTS.items():
+        variants[variant_name] = {}
+        for file_format in get_available_formats():
+            path = default_storage.save(
+                posixpath.join(
+                    directory,
+                    'variants',
+                    f'{stem}_{variant_name}.{file_format}'
+                ),
+                ContentFile(render_variant(image, size, file_format)),
+            )
+            variants[variant_name][file_format] = path
+    return variants
+
+
+def delete_variants(variants):
+    for variant_name in IMAGE_VARIANTS:
+        for path in (variants or {}).get(variant_name, {}).values():
+            default_storage.delete(path)
+
+
+def needs_variants(instance, image_field, variants_field):
+    image = getattr(instance, image_field)
+    variants = getattr(instance, variants_field) or {}
+    return variants.get('source') != (image.name if image else None)
+
+
+def process_variants(model, pk, image_field, variants_field):
+    """Обновляет варианты изображения объекта, если оно изменилось.
+
+    Когда изображение удалено, варианты очищаются вместе с их файлами.
+    """
+    instance = model.objects.filter(pk=pk).only(
+        image_field, variants_field
+    ).first()
+    if instance is None or not needs_variants(
+        instance, image_field, variants_field
+    ):
+        return
+    old_variants = getattr(instance, variants_field)
+    name = getattr(instance, image_field).name
+    variants = generate_variants(name) if name else {}
+    updated = model.objects.filter(pk=pk, **{image_field: name}).update(
+        **{variants_field: variants}
+    )
+    if updated:
+        delete_variants(old_variants)
+        bump_object_version(model, pk)
+    else:
+        delete_variants(variants)
+
+
+def _run(model, pk, image_field, variants_field):
+    try:
+        process_variants(model, pk, image_field, variants_field)
+    except Exception:
+        logger.exception(
+            'Не удалось обработать изображение %s #%s',
+            model._meta.label, pk
+        )
+
+
+def _run_in_thread(*args):
+    try:
+        _run(*args)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(instance, image_field, variants_field):
+    """Ставит построение вариантов в фоновую очередь после коммита."""
+    global _executor
+    if not needs_variants(instance, image_field, variants_field):
+        return
+    args = (type(instance), instance.pk, image_field, variants_field)
+    if not settings.IMAGE_VARIANT_WORKERS:
+        transaction.on_commit(lambda: _run(*args))
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_VARIANT_WORKERS,
+            thread_name_prefix='image-variants',
+        )
+    transaction.on_commit(lambda: _executor.submit(_run_in_thread, *args))
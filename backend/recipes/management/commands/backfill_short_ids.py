@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.shortlinks import generate_short_id
+
+
+class Command(BaseCommand):
+    help = 'Заполняет короткие ссылки рецептов, у которых их нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество рецептов, обновляемых одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        updated = 0
+        while True:
+            recipes = list(
+                Recipe.objects.filter(short_id__isnull=True).only('id')
+                .order_by('id')[:options['batch_size']]
+            )
+            if not recipes:
+                break
+            reserved = set()
+            for recipe in recipes:
+                recipe.short_id = generate_short_id(
+                    lambda short_id: (
+                        short_id in reserved
+                        or Recipe.short_id_taken(short_id)
+                    )
+                )
+                reserved.add(recipe.short_id)
+            Recipe.objects.bulk_update(recipes, ['short_id'])
+            updated += len(recipes)
+        self.stdout.write(self.style.SUCCESS(
+            f'Короткие ссылки добавлены {updated} рецептам.'
+        ))
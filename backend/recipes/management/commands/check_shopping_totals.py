@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import ShoppingList
+from recipes.shopping import (
+    find_mismatches,
+    iter_shopping_list_ids,
+    refresh_totals,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет итоги ингредиентов в списках покупок с рецептами. '
+        'Завершается ошибкой, если найдены расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Пересчитать списки с расхождениями',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        checked = 0
+        broken = {}
+        for batch in iter_shopping_list_ids(options['batch_size']):
+            mismatches = find_mismatches(batch)
+            if mismatches and options['fix']:
+                refresh_totals(list(mismatches))
+            broken.update(mismatches)
+            checked += len(batch)
+        owners = dict(
+            ShoppingList.objects.filter(id__in=broken)
+            .values_list('id', 'user_id')
+        )
+        for shopping_list_id, count in sorted(broken.items()):
+            self.stdout.write(
+                f'Список {shopping_list_id} (пользователь '
+                f'{owners.get(shopping_list_id)}): расхождений {count}'
+            )
+        if broken and not options['fix']:
+            raise CommandError(
+                f'Расхождения в {len(broken)} из {checked} списков. '
+                'Запустите с --fix или rebuild_shopping_totals.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено списков: {checked}, исправлено: {len(broken)}.'
+            if broken else f'Проверено списков: {checked}, расхождений нет.'
+        ))
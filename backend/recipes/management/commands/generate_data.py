@@ -0,0 +1,252 @@
+import os
+import time
+from random import Random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models.functions import Length
+
+from recipes.bulk import batched
+from recipes.counters import reconcile
+from recipes.models import Ingredients, Recipe, Tag
+from recipes.synthetic import (
+    DEFAULT_TAGS,
+    SHORT_ID_ALPHABET,
+    SHORT_ID_PREFIX,
+    GeneratorConfig,
+    create_activity,
+    create_recipes,
+    create_users,
+    make_placeholder_image,
+    run_tasks,
+    skewed_count,
+    zipf_cum_weights,
+)
+from recipes.versions import bump_table_version
+
+
+User = get_user_model()
+
+MAX_RECIPES_FACTOR = 100
+
+
+def next_short_id_number():
+    """Номер, с которого продолжается нумерация синтетических ссылок."""
+    last = (
+        Recipe.objects.filter(short_id__startswith=SHORT_ID_PREFIX)
+        .order_by(Length('short_id').desc(), '-short_id')
+        .values_list('short_id', flat=True)
+        .first()
+    )
+    if last is None:
+        return 0
+    return int(last[len(SHORT_ID_PREFIX):], len(SHORT_ID_ALPHABET)) + 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт синтетических пользователей, рецепты, избранное, списки '
+        'покупок и подписки для нагрузочного тестирования.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument(
+            '--recipes-per-user',
+            type=float,
+            default=2,
+            help='Среднее число рецептов у пользователя',
+        )
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--favorites-per-user', type=float, default=10)
+        parser.add_argument('--cart-per-user', type=float, default=3)
+        parser.add_argument('--follows-per-user', type=float, default=5)
+        parser.add_argument(
+            '--prefix',
+            default='synthetic',
+            help='Префикс логинов создаваемых пользователей',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Примерное количество строк в одной задаче',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help=(
+                'Число процессов, по умолчанию все ядра для PostgreSQL '
+                'и один процесс для остальных БД'
+            ),
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Вставка строк через COPY (PostgreSQL)',
+        )
+
+    def handle(self, *args, **options):
+        postgresql = connection.vendor == 'postgresql'
+        if options['copy'] and not postgresql:
+            raise CommandError('--copy доступен только для PostgreSQL.')
+        workers = options['workers'] or (os.cpu_count() if postgresql else 1)
+        if workers > 1 and not postgresql:
+            raise CommandError(
+                'Параллельная запись поддерживается только для PostgreSQL.'
+            )
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(
+                f'Пользователи с префиксом {prefix} уже есть, '
+                'укажите другой --prefix.'
+            )
+        ingredients = list(
+            Ingredients.objects.order_by('id').values_list('id', flat=True)
+        )
+        if not ingredients:
+            raise CommandError(
+                'Сначала загрузите ингредиенты командой load_ingredients.'
+            )
+        self.workers = workers
+        image, image_variants = make_placeholder_image()
+        config = GeneratorConfig(
+            prefix=prefix,
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            use_copy=options['copy'],
+            password=make_password(None),
+            image=image,
+            image_variants=image_variants,
+            recipes_per_user=options['recipes_per_user'],
+            ingredients_per_recipe=options['ingredients_per_recipe'],
+            favorites_per_user=options['favorites_per_user'],
+            cart_per_user=options['cart_per_user'],
+            follows_per_user=options['follows_per_user'],
+        )
+        started = time.monotonic()
+        user_ids = self.generate_users(config, options['users'])
+        Random(f'{config.seed}:ingredients').shuffle(ingredients)
+        recipe_counts = self.generate_recipes(
+            config, user_ids, ingredients, self.get_tags()
+        )
+        self.generate_activity(config, user_ids, recipe_counts)
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные созданы за {time.monotonic() - started:.2f} с.'
+        ))
+
+    def report(self, label, rows, started):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(
+            f'{label}: {rows} за {elapsed:.2f} с '
+            f'({rows / elapsed:.0f} строк/с).'
+        )
+
+    def get_tags(self):
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                [Tag(name=name, slug=slug) for name, slug in DEFAULT_TAGS],
+                ignore_conflicts=True,
+            )
+            bump_table_version(Tag)
+        return list(Tag.objects.order_by('id').values_list('id', flat=True))
+
+    def generate_users(self, config, count):
+        started = time.monotonic()
+        tasks = [
+            (index, start, min(start + config.batch_size, count))
+            for index, start in enumerate(
+                range(0, count, config.batch_size)
+            )
+        ]
+        created = sum(run_tasks(
+            create_users, tasks, self.workers, {'config': config}
+        ))
+        self.report('Пользователи', created, started)
+        return list(
+            User.objects.filter(username__startswith=f'{config.prefix}_')
+            .order_by('id').values_list('id', flat=True)
+        )
+
+    def generate_recipes(self, config, user_ids, ingredients, tags):
+        started = time.monotonic()
+        rng = Random(f'{config.seed}:recipe_counts')
+        limit = int(config.recipes_per_user * MAX_RECIPES_FACTOR) + 1
+        recipe_counts = {
+            user_id: skewed_count(rng, config.recipes_per_user, limit)
+            for user_id in user_ids
+        }
+        tasks, authors, rows = [], [], 0
+        offset = next_short_id_number()
+        for user_id, count in recipe_counts.items():
+            if not count:
+                continue
+            authors.append((user_id, count))
+            rows += count
+            if rows >= config.batch_size:
+                tasks.append((len(tasks), authors, offset))
+                offset += rows
+                authors, rows = [], 0
+        if authors:
+            tasks.append((len(tasks), authors, offset))
+        state = {
+            'config': config,
+            'ingredients': ingredients,
+            'ingredient_weights': zipf_cum_weights(len(ingredients)),
+            'tags': tags,
+        }
+        recipes = recipe_ingredients = 0
+        for created, created_ingredients in run_tasks(
+            create_recipes, tasks, self.workers, state
+        ):
+            recipes += created
+            recipe_ingredients += created_ingredients
+        self.report('Рецепты', recipes, started)
+        self.report('Ингредиенты в рецептах', recipe_ingredients, started)
+        return recipe_counts
+
+    def generate_activity(self, config, user_ids, recipe_counts):
+        started = time.monotonic()
+        recipes = list(
+            Recipe.objects.filter(
+                author_id__gte=user_ids[0],
+                author_id__lte=user_ids[-1],
+                short_id__startswith=SHORT_ID_PREFIX,
+            ).values_list('id', flat=True)
+        )
+        if not recipes:
+            return
+        Random(f'{config.seed}:popularity').shuffle(recipes)
+        authors = sorted(
+            user_ids, key=lambda user_id: -recipe_counts[user_id]
+        )
+        per_user = max(1, round(
+            config.favorites_per_user
+            + config.cart_per_user
+            + config.follows_per_user
+        ))
+        chunk = max(1, config.batch_size // per_user)
+        tasks = [
+            (index, user_ids[start:start + chunk])
+            for index, start in enumerate(range(0, len(user_ids), chunk))
+        ]
+        state = {
+            'config': config,
+            'recipes': recipes,
+            'recipe_weights': zipf_cum_weights(len(recipes)),
+            'authors': authors,
+            'author_weights': zipf_cum_weights(len(authors)),
+        }
+        favorites = cart_items = follows = 0
+        for created in run_tasks(create_activity, tasks, self.workers, state):
+            favorites += created[0]
+            cart_items += created[1]
+            follows += created[2]
+        for batch in batched(recipes, config.batch_size):
+            reconcile(batch)
+        self.report('Избранное', favorites, started)
+        self.report('Рецепты в списках покупок', cart_items, started)
+        self.report('Подписки', follows, started)
@@ -0,0 +1,152 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from recipes.bulk import CopyStream, batched
+from recipes.models import Ingredients
+from recipes.versions import bump_table_version
+
+
+DEFAULT_PATH = settings.BASE_DIR.parent / 'data' / 'ingredients.csv'
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def iter_csv(file):
+    """Читает пары (название, единица измерения) из CSV без заголовка."""
+    for row in csv.reader(file):
+        if len(row) >= 2:
+            yield row[0].strip(), row[1].strip()
+
+
+def iter_json(file):
+    """Потоково читает JSON-массив объектов name/measurement_unit."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    while True:
+        chunk = file.read(READ_CHUNK_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != '[':
+                    raise CommandError('Ожидается JSON-массив объектов.')
+                started = True
+                position += 1
+                continue
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise CommandError('Некорректный JSON-файл.')
+                break
+            yield item['name'].strip(), item['measurement_unit'].strip()
+        if not chunk:
+            return
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает ингредиенты из CSV или JSON. Повторный запуск '
+        'не создаёт дубликатов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=str(DEFAULT_PATH),
+            help='Путь к файлу с ингредиентами (.csv или .json)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=('csv', 'json'),
+            help='Формат файла, по умолчанию определяется по расширению',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одном запросе',
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Загрузка через COPY во временную таблицу (PostgreSQL)',
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f'Файл {path} не найден.')
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in ('csv', 'json'):
+            raise CommandError('Поддерживаются только файлы csv и json.')
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('--copy доступен только для PostgreSQL.')
+        reader = iter_csv if file_format == 'csv' else iter_json
+        started = time.monotonic()
+        with open(path, encoding='utf-8', newline='') as file:
+            rows = reader(file)
+            if options['copy']:
+                processed, created = self.load_with_copy(rows)
+            else:
+                processed, created = self.load_with_bulk_create(
+                    rows, options['batch_size']
+                )
+        bump_table_version(Ingredients)
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано {processed} строк, добавлено {created} '
+            f'за {elapsed:.2f} с ({processed / elapsed:.0f} строк/с).'
+        ))
+
+    def load_with_bulk_create(self, rows, batch_size):
+        processed = 0
+        before = Ingredients.objects.count()
+        for batch in batched(rows, batch_size):
+            Ingredients.objects.bulk_create(
+                [
+                    Ingredients(name=name, measurement_unit=unit)
+                    for name, unit in batch
+                ],
+                ignore_conflicts=True,
+            )
+            processed += len(batch)
+            if self.verbosity > 1:
+                self.stdout.write(f'Обработано {processed} строк...')
+        return processed, Ingredients.objects.count() - before
+
+    def load_with_copy(self, rows):
+        stream = CopyStream(rows)
+        table = Ingredients._meta.db_table
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TABLE ingredients_staging '
+                '(name varchar(128), measurement_unit varchar(64)) '
+                'ON COMMIT DROP'
+            )
+            cursor.cursor.copy_expert(
+                'COPY ingredients_staging (name, measurement_unit) '
+                'FROM STDIN',
+                stream,
+            )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit '
+                'FROM ingredients_staging '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+            created = cursor.rowcount
+        return stream.processed, created
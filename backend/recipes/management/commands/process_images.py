@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from recipes.images import needs_variants, process_variants
+from recipes.models import Recipe
+
+
+User = get_user_model()
+
+IMAGE_FIELDS = (
+    (Recipe, 'image', 'image_variants'),
+    (User, 'avatar', 'avatar_variants'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт уменьшенные копии изображений рецептов и аватаров, '
+        'для которых они ещё не построены.'
+    )
+
+    def handle(self, *args, **options):
+        for model, image_field, variants_field in IMAGE_FIELDS:
+            processed = 0
+            queryset = model.objects.exclude(**{
+                image_field: '', variants_field: {}
+            }).only(
+                image_field, variants_field
+            ).order_by('pk')
+            for instance in queryset.iterator():
+                if not needs_variants(instance, image_field, variants_field):
+                    continue
+                try:
+                    process_variants(
+                        model, instance.pk, image_field, variants_field
+                    )
+                except (OSError, ValueError) as error:
+                    self.stderr.write(
+                        f'{model._meta.verbose_name} #{instance.pk}: {error}'
+                    )
+                    continue
+                processed += 1
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: обработано {processed}.'
+            ))
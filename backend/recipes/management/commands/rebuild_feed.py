@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from recipes.feed import rebuild
+from users.models import Follow
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново собирает ленты подписок пользователей, например после '
+        'массовой загрузки рецептов или подписок в обход моделей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='users',
+            help='Пересобрать только ленту этого пользователя',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options['users'] or list(
+            Follow.objects.order_by('user_id')
+            .values_list('user_id', flat=True).distinct()
+        )
+        rebuilt = 0
+        for user_id in user_ids:
+            rebuild(user_id)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрано лент: {rebuilt}.'
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from recipes.shopping import iter_shopping_list_ids, refresh_totals
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает итоги ингредиентов в списках покупок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='users',
+            help='Пересчитать только список этого пользователя',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество списков, пересчитываемых за раз',
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = 0
+        for batch in iter_shopping_list_ids(
+            options['batch_size'], options['users']
+        ):
+            refresh_totals(batch)
+            rebuilt += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано списков покупок: {rebuilt}.'
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.counters import find_mismatches, iter_recipe_ids, reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики избранного и списков покупок рецептов с '
+        'таблицами связей и исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить и завершиться ошибкой при расхождениях',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        checked = 0
+        broken = 0
+        for batch in iter_recipe_ids(options['batch_size']):
+            mismatches = find_mismatches(batch)
+            for recipe_id, *counters in mismatches:
+                self.stdout.write(
+                    'Рецепт {}: избранное {} -> {}, списки покупок {} -> {}'
+                    .format(recipe_id, *counters)
+                )
+            if mismatches and not options['check']:
+                reconcile([mismatch[0] for mismatch in mismatches])
+            broken += len(mismatches)
+            checked += len(batch)
+        if broken and options['check']:
+            raise CommandError(
+                f'Расхождения в {broken} из {checked} рецептов. '
+                'Запустите команду без --check.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено рецептов: {checked}, исправлено: {broken}.'
+            if broken else f'Проверено рецептов: {checked}, расхождений нет.'
+        ))
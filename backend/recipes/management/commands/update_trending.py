@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+import recipes.constants as constants
+from recipes.trending import update_scores
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает популярность рецептов с затуханием по времени для '
+        '/api/recipes/trending/. Запускается по расписанию, например cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--half-life-hours',
+            type=float,
+            default=constants.TRENDING_HALF_LIFE_HOURS,
+            help='Через сколько часов вклад добавления уменьшается вдвое',
+        )
+        parser.add_argument(
+            '--favorite-weight',
+            type=float,
+            default=constants.TRENDING_FAVORITE_WEIGHT,
+        )
+        parser.add_argument(
+            '--cart-weight',
+            type=float,
+            default=constants.TRENDING_CART_WEIGHT,
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['half_life_hours'] <= 0:
+            raise CommandError('--half-life-hours должен быть больше нуля.')
+        created, updated, deleted = update_scores(
+            half_life=timedelta(hours=options['half_life_hours']),
+            favorite_weight=options['favorite_weight'],
+            cart_weight=options['cart_weight'],
+            min_score=constants.TRENDING_MIN_SCORE,
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг обновлён: добавлено {created}, обновлено {updated}, '
+            f'удалено {deleted}.'
+        ))
@@ -0,0 +1,73 @@
+# Generated by Django 3.2.3 on 2026-10-17 05:59
+
+from django.db import migrations, models
+
+
+AMOUNT_MAX = 32000
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Оставляет по одному ингредиенту на пару название и единица.
+
+    Строки рецептов переносятся на оставшийся ингредиент, а если рецепт
+    ссылался на несколько дублей, их количества складываются в одну
+    строку.
+    """
+    Ingredients = apps.get_model('recipes', 'Ingredients')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    duplicates = (
+        Ingredients.objects.values('name', 'measurement_unit')
+        .annotate(survivor=models.Min('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for group in duplicates:
+        ingredient_ids = list(
+            Ingredients.objects.filter(
+                name=group['name'],
+                measurement_unit=group['measurement_unit'],
+            ).values_list('id', flat=True)
+        )
+        kept = {}
+        removed = []
+        for row in RecipeIngredient.objects.filter(
+            ingredient_id__in=ingredient_ids
+        ).order_by('recipe_id', 'id'):
+            if row.recipe_id in kept:
+                kept[row.recipe_id].amount += row.amount
+                removed.append(row.pk)
+            else:
+                kept[row.recipe_id] = row
+        for row in kept.values():
+            row.ingredient_id = group['survivor']
+            row.amount = min(row.amount, AMOUNT_MAX)
+        RecipeIngredient.objects.bulk_update(
+            kept.values(), ['ingredient', 'amount']
+        )
+        RecipeIngredient.objects.filter(pk__in=removed).delete()
+        Ingredients.objects.filter(pk__in=ingredient_ids).exclude(
+            pk=group['survivor']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    # В PostgreSQL нельзя менять таблицу в транзакции, где остались
+    # отложенные проверки внешних ключей после удаления дублей.
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0018_auto_20250609_1115'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients,
+            migrations.RunPython.noop,
+            atomic=True,
+        ),
+        migrations.AlterUniqueTogether(
+            name='ingredients',
+            unique_together={('name', 'measurement_unit')},
+        ),
+    ]
@@ -0,0 +1,148 @@
+# Generated by Django 3.2.3 on 2026-10-17 06:21
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+FORWARD_SQL = """
+CREATE OR REPLACE FUNCTION recipes_recipe_build_search_vector(
+    bigint, text, text
+) RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('russian', coalesce($2, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipes_recipeingredient AS recipe_ingredient
+            JOIN recipes_ingredients AS ingredient
+                ON ingredient.id = recipe_ingredient.ingredient_id
+            WHERE recipe_ingredient.recipe_id = $1
+        ), '')), 'B')
+        || setweight(to_tsvector('russian', coalesce($3, '')), 'C');
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION recipes_recipe_search_vector_trigger()
+RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := recipes_recipe_build_search_vector(
+        NEW.id, NEW.name, NEW.text
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER recipes_recipe_search_vector
+BEFORE INSERT OR UPDATE OF name, text ON recipes_recipe
+FOR EACH ROW EXECUTE PROCEDURE recipes_recipe_search_vector_trigger();
+
+CREATE OR REPLACE FUNCTION recipes_recipeingredient_search_vector_trigger()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        UPDATE recipes_recipe AS recipe
+        SET search_vector = recipes_recipe_build_search_vector(
+            recipe.id, recipe.name, recipe.text
+        )
+        WHERE recipe.id IN (
+            SELECT recipe_id FROM changed_rows
+            UNION SELECT recipe_id FROM previous_rows
+        );
+    ELSE
+        UPDATE recipes_recipe AS recipe
+        SET search_vector = recipes_recipe_build_search_vector(
+            recipe.id, recipe.name, recipe.text
+        )
+        WHERE recipe.id IN (SELECT recipe_id FROM changed_rows);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER recipes_recipeingredient_search_vector_insert
+AFTER INSERT ON recipes_recipeingredient
+REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT
+EXECUTE PROCEDURE recipes_recipeingredient_search_vector_trigger();
+
+CREATE TRIGGER recipes_recipeingredient_search_vector_update
+AFTER UPDATE ON recipes_recipeingredient
+REFERENCING OLD TABLE AS previous_rows NEW TABLE AS changed_rows
+FOR EACH STATEMENT
+EXECUTE PROCEDURE recipes_recipeingredient_search_vector_trigger();
+
+CREATE TRIGGER recipes_recipeingredient_search_vector_delete
+AFTER DELETE ON recipes_recipeingredient
+REFERENCING OLD TABLE AS changed_rows
+FOR EACH STATEMENT
+EXECUTE PROCEDURE recipes_recipeingredient_search_vector_trigger();
+
+CREATE OR REPLACE FUNCTION recipes_ingredients_search_vector_trigger()
+RETURNS trigger AS $$
+BEGIN
+    UPDATE recipes_recipe AS recipe
+    SET search_vector = recipes_recipe_build_search_vector(
+        recipe.id, recipe.name, recipe.text
+    )
+    WHERE recipe.id IN (
+        SELECT recipe_id FROM recipes_recipeingredient
+        WHERE ingredient_id = NEW.id
+    );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER recipes_ingredients_search_vector
+AFTER UPDATE OF name ON recipes_ingredients
+FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+EXECUTE PROCEDURE recipes_ingredients_search_vector_trigger();
+
+UPDATE recipes_recipe
+SET search_vector = recipes_recipe_build_search_vector(id, name, text);
+
+CREATE INDEX recipes_recipe_search_vector_gin
+ON recipes_recipe USING gin (search_vector);
+"""
+
+REVERSE_SQL = """
+DROP INDEX IF EXISTS recipes_recipe_search_vector_gin;
+DROP TRIGGER IF EXISTS recipes_ingredients_search_vector
+    ON recipes_ingredients;
+DROP TRIGGER IF EXISTS recipes_recipeingredient_search_vector_insert
+    ON recipes_recipeingredient;
+DROP TRIGGER IF EXISTS recipes_recipeingredient_search_vector_update
+    ON recipes_recipeingredient;
+DROP TRIGGER IF EXISTS recipes_recipeingredient_search_vector_delete
+    ON recipes_recipeingredient;
+DROP TRIGGER IF EXISTS recipes_recipe_search_vector ON recipes_recipe;
+DROP FUNCTION IF EXISTS recipes_ingredients_search_vector_trigger();
+DROP FUNCTION IF EXISTS recipes_recipeingredient_search_vector_trigger();
+DROP FUNCTION IF EXISTS recipes_recipe_search_vector_trigger();
+DROP FUNCTION IF EXISTS recipes_recipe_build_search_vector(
+    bigint, text, text
+);
+"""
+
+
+def run_on_postgresql(sql):
+    """Триггеры и GIN-индекс есть только в PostgreSQL."""
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0022_shoppinglistingredient'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Заполняется триггерами PostgreSQL из названия, описания и ингредиентов', null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(
+            run_on_postgresql(FORWARD_SQL),
+            run_on_postgresql(REVERSE_SQL),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.3 on 2026-10-17 06:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0023_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-id'], name='recipe_author_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipeingredient',
+            index=models.Index(fields=['recipe', 'ingredient'], name='recipeingredient_recipe_idx'),
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX recipes_shoppinglist_recipe_recipe_idx '
+            'ON recipes_shoppinglist_recipe (recipe_id, shoppinglist_id);',
+            'DROP INDEX recipes_shoppinglist_recipe_recipe_idx;',
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.3 on 2026-10-17 06:26
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_by_recipe(queryset):
+    return Coalesce(
+        models.Subquery(
+            queryset.filter(recipe=models.OuterRef('pk')).order_by()
+            .values('recipe').annotate(total=models.Count('*'))
+            .values('total'),
+            output_field=models.IntegerField(),
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Favorite = apps.get_model('recipes', 'Favorite')
+    ShoppingList = apps.get_model('recipes', 'ShoppingList')
+    Recipe.objects.update(
+        favorites_count=count_by_recipe(Favorite.objects.all()),
+        in_carts_count=count_by_recipe(
+            ShoppingList.recipe.through.objects.all()
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0024_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В списках покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-favorites_count', '-id'], name='recipe_favorites_count_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 3.2.3 on 2026-10-17 06:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def snapshot_counters(apps, schema_editor):
+    """Запоминает текущие счётчики, чтобы они не попали в рейтинг."""
+    Recipe = apps.get_model('recipes', 'Recipe')
+    TrendingRecipe = apps.get_model('recipes', 'TrendingRecipe')
+    now = timezone.now()
+    recipes = Recipe.objects.filter(
+        models.Q(favorites_count__gt=0) | models.Q(in_carts_count__gt=0)
+    ).values_list('id', 'favorites_count', 'in_carts_count')
+    TrendingRecipe.objects.bulk_create(
+        (
+            TrendingRecipe(
+                recipe_id=recipe_id,
+                score=0.0,
+                favorites_count=favorites,
+                in_carts_count=carts,
+                updated_at=now,
+            )
+            for recipe_id, favorites, carts in recipes.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0025_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingRecipe',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('score', models.FloatField(verbose_name='Популярность')),
+                ('favorites_count', models.PositiveIntegerField(verbose_name='В избранном при расчёте')),
+                ('in_carts_count', models.PositiveIntegerField(verbose_name='В списках покупок при расчёте')),
+                ('updated_at', models.DateTimeField(verbose_name='Дата расчёта')),
+            ],
+            options={
+                'verbose_name': 'Популярный рецепт',
+                'verbose_name_plural': 'Популярные рецепты',
+                'ordering': ('-score', '-recipe'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trendingrecipe',
+            index=models.Index(fields=['-score', '-recipe'], name='trending_score_idx'),
+        ),
+        migrations.RunPython(
+            snapshot_counters, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.3 on 2026-10-17 07:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_popular_recipes(apps, schema_editor):
+    """Рецепты популярных авторов не рассылались по лентам."""
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Follow = apps.get_model('users', 'Follow')
+    popular = (
+        Follow.objects.order_by().values('following')
+        .annotate(followers=models.Count('id'))
+        .filter(followers__gt=settings.FEED_FANOUT_LIMIT)
+        .values('following')
+    )
+    Recipe.objects.filter(author_id__in=popular).update(fanned_out=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_composite_indexes'),
+        ('recipes', '0027_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='fanned_out',
+            field=models.BooleanField(default=True, editable=False, help_text='Снимается, если рецепт не рассылался по лентам подписчиков, а подмешивается при чтении', verbose_name='Разослан по лентам'),
+        ),
+        migrations.RunPython(mark_popular_recipes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('fanned_out', False)), fields=['author', '-id'], name='recipe_unfanned_author_idx'),
+        ),
+    ]
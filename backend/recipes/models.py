@@ -1,9 +1,16 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+)
+from django.db import IntegrityError, connections, models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
-import shortuuid
+from django.db.models.functions import Cast
 
 import recipes.constants as constants
+from recipes.shortlinks import ShortIdAllocationError, generate_short_id
+from users.models import Follow
 
 
 User = get_user_model()
@@ -52,11 +59,82 @@ class Ingredients(models.Model):
         ordering = ['-id']
         verbose_name = 'Ингридиент'
         verbose_name_plural = 'Ингридиенты'
+        unique_together = ('name', 'measurement_unit')
 
     def __str__(self):
         return f'{self.name} - {self.measurement_unit}'
 
 
+class RecipeQuerySet(models.QuerySet):
+    """QuerySet рецептов с данными для сериализатора чтения."""
+
+    def with_user_flags(self, user):
+        """Аннотирует флаги избранного, корзины и подписки на автора."""
+        if not user.is_authenticated:
+            false = models.Value(False, output_field=models.BooleanField())
+            return self.annotate(
+                is_favorited=false,
+                is_in_shopping_cart=false,
+                author_is_subscribed=false,
+            )
+        return self.annotate(
+            is_favorited=models.Exists(Favorite.objects.filter(
+                user=user,
+                recipe=models.OuterRef('pk')
+            )),
+            is_in_shopping_cart=models.Exists(ShoppingList.objects.filter(
+                user=user,
+                recipe=models.OuterRef('pk')
+            )),
+            author_is_subscribed=models.Exists(Follow.objects.filter(
+                user=user,
+                following=models.OuterRef('author')
+            )),
+        )
+
+    def search(self, query):
+        """Полнотекстовый поиск по названию, описанию и ингредиентам.
+
+        На PostgreSQL использует search_vector и сортирует по ts_rank, на
+        остальных БД ищет подстроку без учёта морфологии и ранжирования.
+        """
+        if connections[self.db].vendor != 'postgresql':
+            return self.filter(
+                models.Q(name__icontains=query)
+                | models.Q(text__icontains=query)
+                | models.Q(
+                    recipe_ingredients__ingredient__name__icontains=query
+                )
+            ).distinct()
+        search_query = SearchQuery(
+            query, config=constants.SEARCH_CONFIG, search_type='websearch'
+        )
+        # ts_rank возвращает real; double precision без потерь передаётся
+        # в курсор и обратно, поэтому страницы по рангу не повторяются.
+        return self.filter(search_vector=search_query).annotate(
+            search_rank=Cast(
+                SearchRank(models.F('search_vector'), search_query),
+                models.FloatField(),
+            )
+        ).order_by('-search_rank', '-id')
+
+    def latest_by_authors(self, author_ids, limit):
+        """Последние limit рецептов каждого автора одним запросом."""
+        if not author_ids:
+            return []
+        placeholders = ', '.join(['%s'] * len(author_ids))
+        return self.raw(
+            'SELECT * FROM ('
+            'SELECT *, ROW_NUMBER() OVER ('
+            'PARTITION BY author_id ORDER BY id DESC'
+            f') AS recipe_rank FROM {self.model._meta.db_table} '
+            f'WHERE author_id IN ({placeholders})'
+            ') AS ranked WHERE recipe_rank <= %s '
+            'ORDER BY author_id, recipe_rank',
+            [*author_ids, limit],
+        )
+
+
 class Recipe(models.Model):
     """Модель для рецептов."""
 
@@ -77,6 +155,12 @@ class Recipe(models.Model):
         verbose_name='Изображение',
         help_text='Добавитье изображение к рецепту'
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии изображения',
+    )
     text = models.TextField(
         verbose_name='Описание',
         help_text='Введите описание рецепта',
@@ -108,19 +192,94 @@ class Recipe(models.Model):
         verbose_name='Сокращенная ссылка',
         help_text='Сокращенная ссылка на рецепт'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном',
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В списках покупок',
+    )
+    fanned_out = models.BooleanField(
+        default=True,
+        editable=False,
+        verbose_name='Разослан по лентам',
+        help_text=(
+            'Снимается, если рецепт не рассылался по лентам подписчиков, '
+            'а подмешивается при чтении'
+        ),
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор',
+        help_text=(
+            'Заполняется триггерами PostgreSQL из названия, описания и '
+            'ингредиентов'
+        ),
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ('-id',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = (
+            models.Index(
+                fields=('author', '-id'), name='recipe_author_id_idx'
+            ),
+            models.Index(
+                fields=('author', '-id'),
+                name='recipe_unfanned_author_idx',
+                condition=models.Q(fanned_out=False),
+            ),
+            models.Index(
+                fields=('-favorites_count', '-id'),
+                name='recipe_favorites_count_idx',
+            ),
+        )
 
     def __str__(self):
         return f'{self.author.username} - {self.name}'
 
     def save(self, *args, **kwargs):
-        if not self.short_id:
-            self.short_id = shortuuid.ShortUUID().random(length=6)
-        super().save(*args, **kwargs)
+        if self.short_id:
+            return super().save(*args, **kwargs)
+        for _ in range(constants.SHORT_ID_ATTEMPTS):
+            self.short_id = generate_short_id(self.short_id_taken)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if not self.short_id_taken(self.short_id):
+                    raise
+        raise ShortIdAllocationError(
+            'Не удалось сохранить рецепт с уникальной короткой ссылкой.'
+        )
+
+    @classmethod
+    def short_id_taken(cls, short_id):
+        return cls.objects.filter(short_id=short_id).exists()
+
+    @staticmethod
+    def read_prefetches():
+        """Связи, которые нужны сериализатору чтения рецепта."""
+        return (
+            'tags',
+            models.Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                )
+            ),
+        )
 
     def get_short_url(self, request=None):
         if request:
@@ -157,6 +316,12 @@ class RecipeIngredient(models.Model):
         ordering = ['-id']
         verbose_name = 'Ингридиент в рецепте'
         verbose_name_plural = 'Ингридиенты в рецепте'
+        indexes = (
+            models.Index(
+                fields=('recipe', 'ingredient'),
+                name='recipeingredient_recipe_idx',
+            ),
+        )
 
     def __str__(self):
         return (f'{self.recipe.name} - {self.ingredient.name} -'
@@ -215,3 +380,118 @@ class ShoppingList(models.Model):
     def __str__(self):
         """Возвращает строковое представление списка покупок."""
         return f'{self.user.username} '
+
+    def get_ingredient_totals(self):
+        """Итоги по ингредиентам из предрассчитанной таблицы."""
+        return self.ingredient_totals.values(
+            'ingredient_id',
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            total_amount=models.F('amount'),
+        ).order_by('ingredient__name')
+
+
+class ShoppingListIngredient(models.Model):
+    """Суммарное количество ингредиента в списке покупок.
+
+    Таблица поддерживается сигналами при изменении списка покупок и
+    ингредиентов рецептов, см. recipes/shopping.py.
+    """
+
+    shopping_list = models.ForeignKey(
+        ShoppingList,
+        on_delete=models.CASCADE,
+        related_name='ingredient_totals',
+        verbose_name='Список покупок',
+    )
+    ingredient = models.ForeignKey(
+        Ingredients,
+        on_delete=models.CASCADE,
+        verbose_name='Ингредиент',
+    )
+    amount = models.PositiveIntegerField(verbose_name='Количество')
+
+    class Meta:
+        verbose_name = 'Ингредиент в списке покупок'
+        verbose_name_plural = 'Ингредиенты в списках покупок'
+        unique_together = ('shopping_list', 'ingredient')
+
+    def __str__(self):
+        return f'{self.shopping_list} - {self.ingredient.name} {self.amount}'
+
+
+class TrendingRecipe(models.Model):
+    """Популярность рецепта с затуханием по времени.
+
+    Заполняется командой update_trending. Поля favorites_count и
+    in_carts_count хранят значения счётчиков рецепта на момент расчёта,
+    чтобы следующий запуск учёл только новые добавления.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Рецепт',
+    )
+    score = models.FloatField(verbose_name='Популярность')
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном при расчёте'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='В списках покупок при расчёте'
+    )
+    updated_at = models.DateTimeField(verbose_name='Дата расчёта')
+
+    class Meta:
+        ordering = ('-score', '-recipe')
+        verbose_name = 'Популярный рецепт'
+        verbose_name_plural = 'Популярные рецепты'
+        indexes = (
+            models.Index(
+                fields=('-score', '-recipe'), name='trending_score_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipe_id} - {self.score:.2f}'
+
+
+class TimelineEntry(models.Model):
+    """Рецепт автора в ленте подписчика.
+
+    Заполняется при публикации рецепта и подписке, см. recipes/feed.py.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        unique_together = ('user', 'recipe')
+        indexes = (
+            models.Index(
+                fields=('user', 'author'), name='timeline_user_author_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user_id} - {self.recipe_id}'
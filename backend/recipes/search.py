@@ -0,0 +1,58 @@
+import threading
+from bisect import bisect_left
+
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Ingredients
+from .versions import get_table_version
+
+
+class IngredientPrefixIndex:
+    """Префиксный индекс ингредиентов в памяти процесса.
+
+    Названия хранятся в отсортированном списке, поиск по префиксу
+    выполняется бинарным поиском без обращения к базе данных.
+    Индекс перестраивается, когда меняется версия таблицы ингредиентов,
+    и строится по основной базе: реплика могла ещё не получить изменения.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+
+    def _build(self, version):
+        rows = sorted(
+            (name.lower(), pk, name, measurement_unit)
+            for pk, name, measurement_unit in Ingredients.objects.using(
+                DEFAULT_DB_ALIAS
+            ).values_list('id', 'name', 'measurement_unit').order_by()
+        )
+        keys = [row[0] for row in rows]
+        items = [
+            {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+            for _, pk, name, measurement_unit in rows
+        ]
+        return version, keys, items
+
+    def _get_index(self):
+        version = get_table_version(Ingredients)
+        index = self._index
+        if index is not None and index[0] == version:
+            return index
+        with self._lock:
+            if self._index is None or self._index[0] != version:
+                self._index = self._build(version)
+            return self._index
+
+    def search(self, prefix, limit=None):
+        """Возвращает ингредиенты, название которых начинается с prefix."""
+        _, keys, items = self._get_index()
+        prefix = prefix.lower()
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + chr(0x10FFFF), lo=start)
+        if limit is not None:
+            end = min(end, start + limit)
+        return items[start:end]
+
+
+ingredient_index = IngredientPrefixIndex()
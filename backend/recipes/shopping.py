@@ -0,0 +1,147 @@
+"""Поддержка предрассчитанных итогов списков покупок.
+
+Итоги хранятся в ShoppingListIngredient. При добавлении рецептов к
+итогам прибавляется их вклад, а при удалении рецептов и изменении
+ингредиентов пересчитываются только затронутые пары список-ингредиент.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+
+from .models import RecipeIngredient, ShoppingList, ShoppingListIngredient
+
+
+def get_recipe_amounts(recipe_ids):
+    """Суммарное количество каждого ингредиента в рецептах."""
+    return dict(
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+        .order_by()
+        .values_list('ingredient_id')
+        .annotate(total=Sum('amount'))
+    )
+
+
+def get_shopping_list_ids(recipe_ids):
+    return list(
+        ShoppingList.recipe.through.objects.filter(recipe_id__in=recipe_ids)
+        .values_list('shoppinglist_id', flat=True).distinct()
+    )
+
+
+def compute_totals(shopping_list_ids, ingredient_ids=None):
+    """Итоги по данным рецептов: {(список, ингредиент): количество}."""
+    queryset = RecipeIngredient.objects.filter(
+        recipe__in_shopping_lists__in=shopping_list_ids
+    )
+    if ingredient_ids is not None:
+        queryset = queryset.filter(ingredient_id__in=ingredient_ids)
+    return {
+        (shopping_list_id, ingredient_id): total
+        for shopping_list_id, ingredient_id, total in queryset.order_by()
+        .values_list('recipe__in_shopping_lists', 'ingredient_id')
+        .annotate(total=Sum('amount'))
+    }
+
+
+def get_stored_totals(shopping_list_ids):
+    return {
+        (shopping_list_id, ingredient_id): amount
+        for shopping_list_id, ingredient_id, amount in (
+            ShoppingListIngredient.objects.filter(
+                shopping_list_id__in=shopping_list_ids
+            ).values_list('shopping_list_id', 'ingredient_id', 'amount')
+        )
+    }
+
+
+def add_recipes(shopping_list_ids, recipe_ids):
+    """Прибавляет к итогам списков ингредиенты добавленных рецептов."""
+    amounts = get_recipe_amounts(recipe_ids)
+    if not amounts or not shopping_list_ids:
+        return
+    with transaction.atomic():
+        ShoppingListIngredient.objects.bulk_create(
+            [
+                ShoppingListIngredient(
+                    shopping_list_id=shopping_list_id,
+                    ingredient_id=ingredient_id,
+                    amount=0,
+                )
+                for shopping_list_id in sorted(shopping_list_ids)
+                for ingredient_id in sorted(amounts)
+            ],
+            ignore_conflicts=True,
+        )
+        ShoppingListIngredient.objects.filter(
+            shopping_list_id__in=shopping_list_ids,
+            ingredient_id__in=amounts,
+        ).update(amount=F('amount') + Case(
+            *[
+                When(ingredient_id=ingredient_id, then=Value(amount))
+                for ingredient_id, amount in amounts.items()
+            ],
+            default=Value(0),
+        ))
+
+
+def refresh_totals(shopping_list_ids, ingredient_ids=None):
+    """Пересчитывает итоги списков по указанным ингредиентам или целиком."""
+    if not shopping_list_ids:
+        return
+    totals = compute_totals(shopping_list_ids, ingredient_ids)
+    stored = ShoppingListIngredient.objects.filter(
+        shopping_list_id__in=shopping_list_ids
+    )
+    if ingredient_ids is not None:
+        stored = stored.filter(ingredient_id__in=ingredient_ids)
+    with transaction.atomic():
+        stored.delete()
+        ShoppingListIngredient.objects.bulk_create(
+            ShoppingListIngredient(
+                shopping_list_id=shopping_list_id,
+                ingredient_id=ingredient_id,
+                amount=amount,
+            )
+            for (shopping_list_id, ingredient_id), amount in sorted(
+                totals.items()
+            )
+        )
+
+
+def remove_recipes(shopping_list_ids, recipe_ids):
+    """Обновляет итоги после удаления рецептов из списков."""
+    refresh_totals(shopping_list_ids, list(get_recipe_amounts(recipe_ids)))
+
+
+def recipe_ingredients_changed(recipe_id, ingredient_ids):
+    """Пересчитывает итоги списков, в которых есть изменённый рецепт."""
+    refresh_totals(get_shopping_list_ids([recipe_id]), list(ingredient_ids))
+
+
+def find_mismatches(shopping_list_ids):
+    """Возвращает {список: число расхождений} с пересчётом по рецептам."""
+    expected = compute_totals(shopping_list_ids)
+    stored = get_stored_totals(shopping_list_ids)
+    mismatches = defaultdict(int)
+    for key in expected.keys() | stored.keys():
+        if expected.get(key) != stored.get(key):
+            mismatches[key[0]] += 1
+    return dict(mismatches)
+
+
+def iter_shopping_list_ids(batch_size, user_ids=None):
+    """Идентификаторы списков покупок пачками по batch_size."""
+    queryset = ShoppingList.objects.order_by('id')
+    if user_ids:
+        queryset = queryset.filter(user_id__in=user_ids)
+    last_id = 0
+    while True:
+        batch = list(
+            queryset.filter(id__gt=last_id)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
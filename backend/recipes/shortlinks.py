@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+
+import shortuuid
+from django.conf import settings
+from django.core.cache import cache
+
+from .constants import SHORT_ID_ATTEMPTS, SHORT_ID_LENGTH
+
+
+class ShortIdAllocationError(Exception):
+    """Не удалось подобрать свободный короткий идентификатор."""
+
+
+def generate_short_id(is_taken):
+    """Возвращает случайный короткий идентификатор, которого ещё нет."""
+    for _ in range(SHORT_ID_ATTEMPTS):
+        short_id = shortuuid.ShortUUID().random(length=SHORT_ID_LENGTH)
+        if not is_taken(short_id):
+            return short_id
+    raise ShortIdAllocationError(
+        f'Нет свободного идентификатора за {SHORT_ID_ATTEMPTS} попыток.'
+    )
+
+
+class LRUCache:
+    """Ограниченный по размеру потокобезопасный LRU-кэш с временем жизни."""
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+# Удаление рецепта сбрасывает запись только в текущем процессе, поэтому
+# остальные процессы держат её не дольше SHORT_LINK_LOCAL_TIMEOUT.
+local_cache = LRUCache(
+    settings.SHORT_LINK_LRU_SIZE,
+    settings.SHORT_LINK_LOCAL_TIMEOUT,
+)
+
+
+def short_link_key(short_id):
+    return f'short_link:{short_id}'
+
+
+def resolve_short_id(short_id):
+    """Находит id рецепта по короткому идентификатору.
+
+    Сначала ищет в памяти процесса, затем в общем кэше и только потом
+    в базе данных.
+    """
+    from .models import Recipe
+
+    recipe_id = local_cache.get(short_id)
+    if recipe_id is not None:
+        return recipe_id
+    recipe_id = cache.get(short_link_key(short_id))
+    if recipe_id is None:
+        recipe_id = Recipe.objects.filter(short_id=short_id).values_list(
+            'id', flat=True
+        ).first()
+        if recipe_id is None:
+            return None
+        cache.set(
+            short_link_key(short_id),
+            recipe_id,
+            settings.SHORT_LINK_CACHE_TIMEOUT
+        )
+    local_cache.set(short_id, recipe_id)
+    return recipe_id
+
+
+def forget_short_id(short_id):
+    """Удаляет короткий идентификатор из общего кэша и кэша процесса."""
+    local_cache.delete(short_id)
+    cache.delete(short_link_key(short_id))
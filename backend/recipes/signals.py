@@ -0,0 +1,307 @@
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .counters import FAVORITES, IN_CARTS, change_counter
+from .feed import backfill, fan_out, prune
+from .images import schedule_variants
+from .models import (
+    Favorite,
+    Ingredients,
+    Recipe,
+    RecipeIngredient,
+    ShoppingList,
+    ShoppingListIngredient,
+    Tag,
+    TrendingRecipe,
+)
+from .shopping import (
+    add_recipes,
+    get_recipe_amounts,
+    get_shopping_list_ids,
+    recipe_ingredients_changed,
+    refresh_totals,
+    remove_recipes,
+)
+from .shortlinks import forget_short_id
+from .versions import (
+    bump_object_version,
+    bump_table_version,
+    bump_user_state_version,
+)
+from users.models import Follow
+
+
+User = get_user_model()
+
+USER_SERVICE_FIELDS = frozenset(('last_login', 'password'))
+
+skipped_receivers = ContextVar('skipped_receivers', default=frozenset())
+
+
+@contextmanager
+def skip_receivers(*receivers):
+    """Пропускает обработчики сигналов в текущем контексте.
+
+    Вызывающий код сам выполняет их работу для всей пачки объектов. В
+    отличие от Signal.disconnect, не затрагивает другие потоки.
+    """
+    token = skipped_receivers.set(skipped_receivers.get() | set(receivers))
+    try:
+        yield
+    finally:
+        skipped_receivers.reset(token)
+
+
+def skippable(handler):
+    """Позволяет пропустить обработчик через skip_receivers."""
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        if wrapper not in skipped_receivers.get():
+            return handler(*args, **kwargs)
+
+    return wrapper
+
+
+@receiver(post_save, sender=Ingredients)
+@receiver(post_delete, sender=Ingredients)
+def ingredients_changed(sender, **kwargs):
+    """Сбрасывает префиксный индекс и кэш рецептов."""
+    bump_table_version(Ingredients)
+
+
+@receiver(post_delete, sender=TrendingRecipe)
+def trending_recipe_deleted(sender, **kwargs):
+    """Сбрасывает кэш популярных рецептов при удалении рецепта."""
+    bump_table_version(TrendingRecipe)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, **kwargs):
+    """Сбрасывает кэш рецептов при изменении тегов."""
+    bump_table_version(Tag)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    """Сбрасывает кэш изменённого рецепта."""
+    bump_object_version(Recipe, instance.pk)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """Убирает короткую ссылку удалённого рецепта из кэша."""
+    if instance.short_id:
+        forget_short_id(instance.short_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(sender, instance, **kwargs):
+    """Ставит в очередь уменьшенные копии нового изображения рецепта."""
+    schedule_variants(instance, 'image', 'image_variants')
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+@skippable
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    """Сбрасывает кэш рецепта при изменении его ингредиентов."""
+    Recipe.objects.filter(pk=instance.recipe_id).update(
+        updated_at=timezone.now()
+    )
+    bump_object_version(Recipe, instance.recipe_id)
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def remember_recipe_ingredient(sender, instance, **kwargs):
+    """Запоминает прежний ингредиент строки перед изменением."""
+    instance.previous_ingredient_id = None
+    if instance.pk:
+        instance.previous_ingredient_id = RecipeIngredient.objects.filter(
+            pk=instance.pk
+        ).values_list('ingredient_id', flat=True).first()
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+@skippable
+def recipe_ingredient_totals_changed(sender, instance, **kwargs):
+    """Пересчитывает итоги списков покупок с этим рецептом."""
+    ingredient_ids = {instance.ingredient_id}
+    previous = getattr(instance, 'previous_ingredient_id', None)
+    if previous:
+        ingredient_ids.add(previous)
+    recipe_ingredients_changed(instance.recipe_id, ingredient_ids)
+
+
+@receiver(pre_delete, sender=Recipe)
+def remember_recipe_shopping_lists(sender, instance, **kwargs):
+    """Запоминает списки покупок, из которых пропадёт рецепт."""
+    instance.shopping_list_ids = get_shopping_list_ids([instance.pk])
+    instance.ingredient_ids = list(get_recipe_amounts([instance.pk]))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_shopping_lists_changed(sender, instance, **kwargs):
+    """Пересчитывает итоги списков покупок после удаления рецепта."""
+    refresh_totals(
+        getattr(instance, 'shopping_list_ids', []),
+        getattr(instance, 'ingredient_ids', []),
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, **kwargs):
+    """Сбрасывает кэш рецептов при изменении набора тегов."""
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        bump_table_version(Tag)
+    else:
+        bump_object_version(Recipe, instance.pk)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    """Сбрасывает кэш рецептов автора при изменении профиля."""
+    if update_fields and USER_SERVICE_FIELDS.issuperset(update_fields):
+        return
+    bump_object_version(User, instance.pk)
+    schedule_variants(instance, 'avatar', 'avatar_variants')
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+@skippable
+def user_state_changed(sender, instance, **kwargs):
+    """Отмечает изменение избранного или подписок пользователя."""
+    bump_user_state_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=ShoppingList.recipe.through)
+def shopping_list_changed(sender, instance, action, reverse, **kwargs):
+    """Отмечает изменение списка покупок пользователя."""
+    if action.startswith('post_') and not reverse:
+        bump_user_state_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=ShoppingList.recipe.through)
+def shopping_list_totals_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Обновляет итоги ингредиентов при изменении списка покупок."""
+    if reverse:
+        shopping_list_ids, recipe_ids = pk_set, [instance.pk]
+    else:
+        shopping_list_ids, recipe_ids = [instance.pk], pk_set
+    if action == 'post_add':
+        add_recipes(shopping_list_ids, recipe_ids)
+    elif action == 'post_remove':
+        remove_recipes(shopping_list_ids, recipe_ids)
+    elif action == 'pre_clear' and not reverse:
+        ShoppingListIngredient.objects.filter(shopping_list=instance).delete()
+    elif action == 'pre_clear':
+        instance.shopping_list_ids = get_shopping_list_ids([instance.pk])
+    elif action == 'post_clear' and reverse:
+        remove_recipes(instance.shopping_list_ids, recipe_ids)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_added(sender, instance, created, **kwargs):
+    """Увеличивает счётчик избранного рецепта."""
+    if created:
+        change_counter(FAVORITES, [instance.recipe_id], 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@skippable
+def favorite_removed(sender, instance, **kwargs):
+    """Уменьшает счётчик избранного рецепта."""
+    change_counter(FAVORITES, [instance.recipe_id], -1)
+
+
+@receiver(m2m_changed, sender=ShoppingList.recipe.through)
+def shopping_list_counters_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Обновляет счётчики рецептов в списках покупок.
+
+    pk_set при удалении содержит все переданные объекты, поэтому перед
+    удалением запоминаются только действительно связанные.
+    """
+    if reverse:
+        links = sender.objects.filter(recipe=instance)
+        if action == 'pre_remove':
+            instance.removed_links = links.filter(
+                shoppinglist_id__in=pk_set
+            ).count()
+        elif action == 'post_add':
+            change_counter(IN_CARTS, [instance.pk], len(pk_set))
+        elif action == 'post_remove':
+            change_counter(IN_CARTS, [instance.pk], -instance.removed_links)
+        elif action == 'post_clear':
+            Recipe.objects.filter(pk=instance.pk).update(in_carts_count=0)
+        return
+    links = sender.objects.filter(shoppinglist=instance)
+    if action == 'pre_remove':
+        links = links.filter(recipe_id__in=pk_set)
+    if action in ('pre_remove', 'pre_clear'):
+        instance.removed_recipe_ids = list(
+            links.values_list('recipe_id', flat=True)
+        )
+    elif action == 'post_add':
+        change_counter(IN_CARTS, pk_set, 1)
+    elif action in ('post_remove', 'post_clear'):
+        change_counter(IN_CARTS, instance.removed_recipe_ids, -1)
+
+
+@receiver(pre_delete, sender=ShoppingList)
+def remember_shopping_list_recipes(sender, instance, **kwargs):
+    """Запоминает рецепты списка покупок, удаляемого вместе со связями."""
+    instance.removed_recipe_ids = list(
+        instance.recipe.values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=ShoppingList)
+def shopping_list_deleted(sender, instance, **kwargs):
+    """Уменьшает счётчики рецептов удалённого списка покупок."""
+    change_counter(IN_CARTS, getattr(instance, 'removed_recipe_ids', []), -1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(sender, instance, created, **kwargs):
+    """Рассылает новый рецепт в ленты подписчиков после коммита."""
+    if created:
+        transaction.on_commit(
+            lambda: fan_out(instance.pk, instance.author_id)
+        )
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    """Добавляет в ленту подписчика последние рецепты автора."""
+    if created:
+        backfill(instance.user_id, [instance.following_id])
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """Убирает рецепты автора из ленты бывшего подписчика."""
+    prune(instance.user_id, instance.following_id)
@@ -0,0 +1,308 @@
+"""Генерация больших синтетических наборов данных для нагрузочных тестов.
+
+Объекты создаются пачками через bulk_create или COPY без вызова save() и
+сигналов. Популярность рецептов, авторов и ингредиентов распределена по
+закону Ципфа, количество рецептов и подписок у пользователя — по Парето,
+поэтому в данных есть и «звёзды», и длинный хвост неактивных аккаунтов.
+"""
+import string
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from itertools import accumulate
+from random import Random
+
+import django
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image
+
+from .bulk import copy_objects
+from .images import generate_variants
+
+
+# Алфавит shortuuid не содержит нуля, поэтому сгенерированные здесь
+# короткие ссылки не пересекаются со ссылками обычных рецептов.
+SHORT_ID_PREFIX = '0'
+SHORT_ID_ALPHABET = string.digits + string.ascii_lowercase
+ZIPF_EXPONENT = 1.1
+PARETO_ALPHA = 1.5
+MAX_SAMPLE_ROUNDS = 100
+PLACEHOLDER_NAME = 'recipe/images/synthetic.jpg'
+PLACEHOLDER_SIZE = (1280, 960)
+
+FIRST_NAMES = (
+    'Анна', 'Иван', 'Мария', 'Пётр', 'Ольга', 'Алексей', 'Елена',
+    'Дмитрий', 'Наталья', 'Сергей', 'Татьяна', 'Андрей',
+)
+LAST_NAMES = (
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров',
+    'Соколов', 'Михайлов', 'Новиков', 'Фёдоров', 'Морозов', 'Волков',
+)
+DISHES = (
+    'суп', 'салат', 'пирог', 'омлет', 'плов', 'рагу', 'паста', 'каша',
+    'запеканка', 'котлеты', 'блины', 'борщ', 'жаркое', 'соус', 'десерт',
+)
+DISH_STYLES = (
+    'домашний', 'быстрый', 'праздничный', 'постный', 'летний', 'острый',
+    'бабушкин', 'простой', 'сытный', 'лёгкий',
+)
+COOKING_TIMES = (5, 10, 15, 20, 25, 30, 40, 45, 60, 90, 120, 180)
+AMOUNTS = (1, 2, 3, 5, 10, 20, 50, 100, 150, 200, 250, 300, 500, 1000)
+DEFAULT_TAGS = (
+    ('Завтрак', 'breakfast'),
+    ('Обед', 'lunch'),
+    ('Ужин', 'dinner'),
+    ('Выпечка', 'bakery'),
+    ('Десерт', 'dessert'),
+    ('Вегетарианское', 'vegetarian'),
+)
+
+_state = {}
+
+
+@dataclass
+class GeneratorConfig:
+    """Параметры генерации, общие для всех процессов."""
+
+    prefix: str
+    seed: int
+    batch_size: int
+    use_copy: bool
+    password: str = ''
+    image: str = ''
+    image_variants: dict = None
+    recipes_per_user: float = 2
+    ingredients_per_recipe: int = 8
+    favorites_per_user: float = 10
+    cart_per_user: float = 3
+    follows_per_user: float = 5
+
+
+def encode_short_id(number):
+    digits = ''
+    while True:
+        number, remainder = divmod(number, len(SHORT_ID_ALPHABET))
+        digits = SHORT_ID_ALPHABET[remainder] + digits
+        if not number:
+            return SHORT_ID_PREFIX + digits
+
+
+def zipf_cum_weights(count, exponent=ZIPF_EXPONENT):
+    """Накопленные веса для выбора: k-й элемент в k^s раз реже первого."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def skewed_count(rng, mean, limit):
+    """Случайное число с тяжёлым хвостом и заданным средним."""
+    value = mean * (PARETO_ALPHA - 1) * (rng.paretovariate(PARETO_ALPHA) - 1)
+    return min(int(value + rng.random()), limit)
+
+
+def skewed_sample(rng, population, cum_weights, count, excluded=None):
+    """Выбирает до count разных элементов, популярные — чаще."""
+    count = min(count, len(population) - (excluded is not None))
+    chosen = set()
+    for _ in range(MAX_SAMPLE_ROUNDS):
+        if len(chosen) >= count:
+            break
+        chosen.update(rng.choices(
+            population, cum_weights=cum_weights, k=count - len(chosen)
+        ))
+        chosen.discard(excluded)
+    return sorted(chosen)
+
+
+def make_placeholder_image():
+    """Сохраняет одно изображение-заглушку и строит его копии."""
+    buffer = BytesIO()
+    Image.new('RGB', PLACEHOLDER_SIZE, (231, 111, 81)).save(buffer, 'JPEG')
+    name = default_storage.save(
+        PLACEHOLDER_NAME, ContentFile(buffer.getvalue())
+    )
+    return name, generate_variants(name)
+
+
+def insert(model, objects, config):
+    if config.use_copy:
+        return copy_objects(model, objects)
+    model.objects.bulk_create(objects, batch_size=config.batch_size)
+    return len(objects)
+
+
+def init_worker(state):
+    if not apps.ready:
+        django.setup()
+    _state.clear()
+    _state.update(state)
+
+
+def run_tasks(function, tasks, workers, state):
+    """Выполняет задачи в workers процессах и возвращает их результаты."""
+    if workers == 1:
+        init_worker(state)
+        yield from map(function, tasks)
+        return
+    # Дочерние процессы не должны наследовать открытые соединения.
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(state,),
+    ) as executor:
+        yield from executor.map(function, tasks)
+
+
+def create_users(task):
+    index, start, stop = task
+    config = _state['config']
+    rng = Random(f'{config.seed}:users:{index}')
+    User = get_user_model()
+    with transaction.atomic():
+        return insert(User, [
+            User(
+                username=f'{config.prefix}_{number}',
+                email=f'{config.prefix}_{number}@example.com',
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                password=config.password,
+            )
+            for number in range(start, stop)
+        ], config)
+
+
+def create_recipes(task):
+    """Создаёт рецепты группы авторов вместе с ингредиентами и тегами."""
+    from .models import Recipe, RecipeIngredient
+
+    index, authors, short_id_offset = task
+    config = _state['config']
+    ingredients = _state['ingredients']
+    ingredient_weights = _state['ingredient_weights']
+    tags = _state['tags']
+    rng = Random(f'{config.seed}:recipes:{index}')
+    recipes = []
+    for author_id, count in authors:
+        for _ in range(count):
+            recipes.append(Recipe(
+                author_id=author_id,
+                name=(
+                    f'{rng.choice(DISH_STYLES).capitalize()} '
+                    f'{rng.choice(DISHES)}'
+                ),
+                text=' '.join(
+                    f'Шаг {step}: {rng.choice(DISH_STYLES)} '
+                    f'{rng.choice(DISHES)}.'
+                    for step in range(1, rng.randint(3, 8))
+                ),
+                image=config.image,
+                image_variants=config.image_variants,
+                cooking_time=rng.choice(COOKING_TIMES),
+                short_id=encode_short_id(short_id_offset),
+            ))
+            short_id_offset += 1
+    if not recipes:
+        return 0, 0
+    with transaction.atomic():
+        insert(Recipe, recipes, config)
+        recipe_ids = Recipe.objects.filter(
+            author_id__gte=authors[0][0],
+            author_id__lte=authors[-1][0],
+            short_id__startswith=SHORT_ID_PREFIX,
+        ).order_by('id').values_list('id', flat=True)
+        recipe_ingredients = []
+        recipe_tags = []
+        for recipe_id in recipe_ids:
+            count = max(1, round(rng.gauss(
+                config.ingredients_per_recipe,
+                config.ingredients_per_recipe / 3
+            )))
+            recipe_ingredients.extend(
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=rng.choice(AMOUNTS),
+                )
+                for ingredient_id in skewed_sample(
+                    rng, ingredients, ingredient_weights, count
+                )
+            )
+            recipe_tags.extend(
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                for tag_id in sorted(rng.sample(
+                    tags, rng.randint(1, min(3, len(tags)))
+                ))
+            )
+        insert(RecipeIngredient, recipe_ingredients, config)
+        insert(Recipe.tags.through, recipe_tags, config)
+    return len(recipes), len(recipe_ingredients)
+
+
+def create_activity(task):
+    """Создаёт избранное, списки покупок и подписки группы пользователей."""
+    from users.models import Follow
+
+    from .models import Favorite, ShoppingList
+    from .shopping import refresh_totals
+
+    index, user_ids = task
+    config = _state['config']
+    recipes = _state['recipes']
+    recipe_weights = _state['recipe_weights']
+    authors = _state['authors']
+    author_weights = _state['author_weights']
+    rng = Random(f'{config.seed}:activity:{index}')
+    favorites, carts, follows = [], {}, []
+    for user_id in user_ids:
+        favorites.extend(
+            Favorite(user_id=user_id, recipe_id=recipe_id)
+            for recipe_id in skewed_sample(
+                rng, recipes, recipe_weights,
+                skewed_count(rng, config.favorites_per_user, len(recipes))
+            )
+        )
+        cart = skewed_sample(
+            rng, recipes, recipe_weights,
+            skewed_count(rng, config.cart_per_user, len(recipes))
+        )
+        if cart:
+            carts[user_id] = cart
+        follows.extend(
+            Follow(user_id=user_id, following_id=author_id)
+            for author_id in skewed_sample(
+                rng, authors, author_weights,
+                skewed_count(rng, config.follows_per_user, len(authors)),
+                excluded=user_id,
+            )
+        )
+    with transaction.atomic():
+        insert(Favorite, favorites, config)
+        insert(Follow, follows, config)
+        insert(
+            ShoppingList,
+            [ShoppingList(user_id=user_id) for user_id in carts],
+            config,
+        )
+        shopping_lists = {
+            user_id: shopping_list_id
+            for user_id, shopping_list_id in ShoppingList.objects.filter(
+                user_id__gte=user_ids[0],
+                user_id__lte=user_ids[-1],
+            ).values_list('user_id', 'id')
+            if user_id in carts
+        }
+        items = [
+            ShoppingList.recipe.through(
+                shoppinglist_id=shopping_list_id, recipe_id=recipe_id
+            )
+            for user_id, shopping_list_id in shopping_lists.items()
+            for recipe_id in carts[user_id]
+        ]
+        insert(ShoppingList.recipe.through, items, config)
+        refresh_totals(list(shopping_lists.values()))
+    return len(favorites), len(items), len(follows)
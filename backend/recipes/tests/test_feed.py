@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from recipes.feed import get_feed_recipe_ids
+from recipes.models import Recipe, TimelineEntry
+from users.models import Follow
+
+
+User = get_user_model()
+
+
+@override_settings(FEED_FANOUT_LIMIT=1)
+class PopularAuthorFeedTests(TestCase):
+    """Рецепты, не разосланные популярным автором, не пропадают из лент."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, cls.reader, cls.other = [
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='pass'
+            )
+            for name in ('author', 'reader', 'other')
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def publish(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Recipe.objects.create(
+                author=self.author, name=name, text='текст', cooking_time=5
+            )
+
+    def follow(self, user):
+        Follow.objects.create(user=user, following=self.author)
+        cache.clear()
+
+    def feed(self, user):
+        return get_feed_recipe_ids(user.pk, None, 10)
+
+    def test_popular_recipe_is_merged_on_read(self):
+        self.follow(self.reader)
+        self.follow(self.other)
+        recipe = self.publish('популярный')
+        recipe.refresh_from_db()
+        self.assertFalse(recipe.fanned_out)
+        self.assertFalse(TimelineEntry.objects.filter(recipe=recipe).exists())
+        self.assertEqual(self.feed(self.reader), [recipe.pk])
+
+    def test_recipe_stays_after_author_is_no_longer_popular(self):
+        self.follow(self.reader)
+        self.follow(self.other)
+        popular = self.publish('популярный')
+        Follow.objects.filter(user=self.other).delete()
+        cache.clear()
+        regular = self.publish('обычный')
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.reader, recipe=regular
+            ).exists()
+        )
+        self.assertEqual(self.feed(self.reader), [regular.pk, popular.pk])
+
+    def test_new_follower_of_popular_author_gets_earlier_recipes(self):
+        self.follow(self.reader)
+        early = self.publish('ранний')
+        self.follow(self.other)
+        popular = self.publish('популярный')
+        newcomer = User.objects.create_user(
+            username='newcomer', email='newcomer@example.com', password='pass'
+        )
+        self.follow(newcomer)
+        self.assertEqual(self.feed(newcomer), [popular.pk, early.pk])
+        self.assertEqual(self.feed(self.reader), [popular.pk, early.pk])
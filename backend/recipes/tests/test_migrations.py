@@ -0,0 +1,72 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class MergeDuplicateIngredientsTests(TransactionTestCase):
+    """Миграция 0019 объединяет дубли перед ограничением уникальности."""
+
+    migrate_from = [
+        ('recipes', '0018_auto_20250609_1115'),
+        ('users', '0004_composite_indexes'),
+    ]
+    migrate_to = [
+        ('recipes', '0019_ingredients_unique_name_unit'),
+        ('users', '0004_composite_indexes'),
+    ]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicates_are_merged(self):
+        apps = self.migrate(self.migrate_from)
+        User = apps.get_model('users', 'User')
+        Ingredients = apps.get_model('recipes', 'Ingredients')
+        Recipe = apps.get_model('recipes', 'Recipe')
+        RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+        author = User.objects.create(username='author', email='a@a.ru')
+        flour, flour_copy, flour_other = [
+            Ingredients.objects.create(name='мука', measurement_unit=unit)
+            for unit in ('г', 'г', 'кг')
+        ]
+        both, copy_only = [
+            Recipe.objects.create(
+                author=author, name=name, text='текст', cooking_time=5,
+                image='recipe/images/test.png',
+            )
+            for name in ('оба дубля', 'только копия')
+        ]
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=recipe, ingredient=item, amount=amount)
+            for recipe, item, amount in (
+                (both, flour, 100),
+                (both, flour_copy, 50),
+                (both, flour_other, 1),
+                (copy_only, flour_copy, 7),
+            )
+        ])
+
+        apps = self.migrate(self.migrate_to)
+        Ingredients = apps.get_model('recipes', 'Ingredients')
+        RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+        self.assertEqual(
+            sorted(Ingredients.objects.values_list('id', flat=True)),
+            [flour.id, flour_other.id],
+        )
+        self.assertEqual(
+            sorted(RecipeIngredient.objects.values_list(
+                'recipe_id', 'ingredient_id', 'amount'
+            )),
+            sorted([
+                (both.id, flour.id, 150),
+                (both.id, flour_other.id, 1),
+                (copy_only.id, flour.id, 7),
+            ]),
+        )
@@ -0,0 +1,107 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from recipes.models import Ingredients, Recipe, RecipeIngredient
+
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+class RecipeSearchTests(TestCase):
+    """Поисковый вектор обновляется триггерами PostgreSQL."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass'
+        )
+        cls.cherry = Ingredients.objects.create(
+            name='вишня', measurement_unit='г'
+        )
+
+    def create_recipe(self, name, text='', ingredients=()):
+        recipe = Recipe.objects.create(
+            author=self.author, name=name, text=text, cooking_time=5
+        )
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in ingredients
+        ])
+        return recipe
+
+    def search(self, query):
+        return list(
+            Recipe.objects.search(query).values_list('id', flat=True)
+        )
+
+    def test_vector_is_built_on_insert(self):
+        recipe = self.create_recipe('Пироги с капустой', 'Запечь в духовке')
+        recipe.refresh_from_db()
+        self.assertIsNotNone(recipe.search_vector)
+        self.assertEqual(self.search('пирог'), [recipe.id])
+        self.assertEqual(self.search('духовка'), [recipe.id])
+
+    def test_vector_follows_recipe_rename(self):
+        recipe = self.create_recipe('Пирог')
+        recipe.name = 'Запеканка'
+        recipe.save()
+        self.assertEqual(self.search('пирог'), [])
+        self.assertEqual(self.search('запеканка'), [recipe.id])
+
+    def test_vector_follows_ingredients(self):
+        recipe = self.create_recipe('Пирог', ingredients=[self.cherry])
+        self.assertEqual(self.search('вишня'), [recipe.id])
+        RecipeIngredient.objects.filter(recipe=recipe).delete()
+        self.assertEqual(self.search('вишня'), [])
+
+    def test_vector_follows_ingredient_rename(self):
+        recipe = self.create_recipe('Пирог', ingredients=[self.cherry])
+        self.cherry.name = 'черешня'
+        self.cherry.save()
+        self.assertEqual(self.search('вишня'), [])
+        self.assertEqual(self.search('черешня'), [recipe.id])
+
+    def test_ranking_prefers_name_then_ingredients_then_text(self):
+        in_text = self.create_recipe('Торт', text='Украсить вишней')
+        in_ingredients = self.create_recipe('Пирог', ingredients=[self.cherry])
+        in_name = self.create_recipe('Вишнёвый компот из вишни')
+        self.assertEqual(
+            self.search('вишня'), [in_name.id, in_ingredients.id, in_text.id]
+        )
+
+    def test_websearch_syntax(self):
+        pie = self.create_recipe('Пирог с вишней')
+        self.create_recipe('Пирог с капустой')
+        self.assertEqual(self.search('пирог -капуста'), [pie.id])
+
+    def test_api_orders_by_rank(self):
+        in_name = self.create_recipe('Пирог с вишней')
+        in_ingredients = self.create_recipe(
+            'Кекс', ingredients=[self.cherry]
+        )
+        in_text = self.create_recipe('Торт', text='Украсить вишней')
+        expected = [in_name.id, in_ingredients.id, in_text.id]
+        response = self.client.get('/api/recipes/', {'search': 'вишня'})
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()['results']],
+            expected,
+        )
+        found = []
+        response = self.client.get(
+            '/api/recipes/', {'search': 'вишня', 'cursor': '', 'limit': 1}
+        ).json()
+        while True:
+            found += [recipe['id'] for recipe in response['results']]
+            if not response['next'] or len(found) > len(expected):
+                break
+            response = self.client.get(response['next']).json()
+        self.assertEqual(found, expected)
+        previous = self.client.get(response['previous']).json()
+        self.assertEqual(
+            [recipe['id'] for recipe in previous['results']],
+            [in_ingredients.id],
+        )
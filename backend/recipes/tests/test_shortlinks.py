@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from benchmarks.dataset import DatasetSize, seed
+from recipes.models import Recipe
+from recipes.shortlinks import (
+    LRUCache,
+    local_cache,
+    resolve_short_id,
+    short_link_key,
+)
+
+
+class LRUCacheTests(SimpleTestCase):
+
+    def test_entries_expire(self):
+        lru = LRUCache(maxsize=2, timeout=30)
+        with mock.patch('recipes.shortlinks.time.monotonic', return_value=0):
+            lru.set('a', 1)
+        with mock.patch('recipes.shortlinks.time.monotonic', return_value=29):
+            self.assertEqual(lru.get('a'), 1)
+        with mock.patch('recipes.shortlinks.time.monotonic', return_value=31):
+            self.assertIsNone(lru.get('a'))
+
+    def test_least_recently_used_is_evicted(self):
+        lru = LRUCache(maxsize=2, timeout=30)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), 1)
+
+    def test_process_cache_uses_local_timeout(self):
+        self.assertEqual(
+            local_cache.timeout, settings.SHORT_LINK_LOCAL_TIMEOUT
+        )
+
+
+class ResolveShortIdTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(DatasetSize(
+            users=2, recipes_per_user=1, ingredients=2,
+            ingredients_per_recipe=1, tags=1, favorites_per_user=0,
+            cart_per_user=0, follows_per_user=0,
+        ))
+        cls.recipe = Recipe.objects.first()
+
+    def setUp(self):
+        cache.clear()
+        local_cache.delete(self.recipe.short_id)
+        self.addCleanup(local_cache.delete, self.recipe.short_id)
+
+    def test_resolved_without_queries_once_cached(self):
+        self.assertEqual(
+            resolve_short_id(self.recipe.short_id), self.recipe.pk
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                resolve_short_id(self.recipe.short_id), self.recipe.pk
+            )
+
+    def test_deleted_recipe_is_forgotten(self):
+        short_id = self.recipe.short_id
+        resolve_short_id(short_id)
+        self.recipe.delete()
+        self.assertIsNone(cache.get(short_link_key(short_id)))
+        self.assertIsNone(resolve_short_id(short_id))
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from recipes.checks import check_shared_cache
+from recipes.models import Ingredients
+from recipes.search import IngredientPrefixIndex
+from recipes.versions import (
+    bump_table_version,
+    get_table_version,
+    version_key,
+)
+
+
+class TableVersionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_evicted_version_is_replaced(self):
+        bump_table_version(Ingredients)
+        version = get_table_version(Ingredients)
+        cache.delete(version_key(Ingredients))
+        self.assertNotEqual(get_table_version(Ingredients), version)
+
+    def test_unchanged_version_is_kept(self):
+        version = get_table_version(Ingredients)
+        with mock.patch('recipes.versions.time.time_ns', return_value=1):
+            self.assertEqual(get_table_version(Ingredients), version)
+        bump_table_version(Ingredients)
+        self.assertNotEqual(get_table_version(Ingredients), version)
+
+    def test_version_keys_do_not_expire(self):
+        with mock.patch.object(cache, 'set') as set_version:
+            bump_table_version(Ingredients)
+        self.assertIsNone(set_version.call_args.args[2])
+
+    def test_index_is_rebuilt_after_version_is_evicted(self):
+        index = IngredientPrefixIndex()
+        self.assertEqual(index.search('соль'), [])
+        Ingredients.objects.bulk_create([
+            Ingredients(name='соль', measurement_unit='г')
+        ])
+        self.assertEqual(index.search('соль'), [])
+        cache.delete(version_key(Ingredients))
+        self.assertEqual(
+            [item['name'] for item in index.search('соль')], ['соль']
+        )
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+
+    @override_settings(GUNICORN_WORKERS=1)
+    def test_single_worker_with_local_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(GUNICORN_WORKERS=4)
+    def test_several_workers_with_local_cache(self):
+        self.assertEqual(
+            [error.id for error in check_shared_cache(None)],
+            ['recipes.E001'],
+        )
+
+    def test_load_test_refuses_several_workers_with_local_cache(self):
+        with self.assertRaisesMessage(CommandError, 'LocMemCache'):
+            call_command('load_test', workers=2)
+
+    @override_settings(
+        GUNICORN_WORKERS=4,
+        CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'cache',
+        }},
+    )
+    def test_several_workers_with_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
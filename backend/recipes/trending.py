@@ -0,0 +1,103 @@
+"""Расчёт популярности рецептов с экспоненциальным затуханием.
+
+Оценка рецепта при каждом запуске умножается на 0.5 в степени
+(прошедшее время / период полураспада), а к ней прибавляются добавления
+в избранное и списки покупок с прошлого запуска. Добавления берутся как
+прирост счётчиков рецепта, поэтому расчёт не группирует таблицы связей.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Recipe, TrendingRecipe
+from .versions import bump_table_version
+
+
+def decay_factor(elapsed, half_life):
+    return 0.5 ** (elapsed.total_seconds() / half_life.total_seconds())
+
+
+def iter_recipe_counters(batch_size):
+    """Счётчики рецептов с активностью или с уже рассчитанной оценкой."""
+    queryset = Recipe.objects.filter(
+        Q(favorites_count__gt=0)
+        | Q(in_carts_count__gt=0)
+        | Q(trending__isnull=False)
+    ).order_by('id')
+    last_id = 0
+    while True:
+        batch = list(
+            queryset.filter(id__gt=last_id).values_list(
+                'id', 'favorites_count', 'in_carts_count'
+            )[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+
+def update_scores(
+    half_life, favorite_weight, cart_weight, min_score, batch_size
+):
+    """Пересчитывает TrendingRecipe и возвращает число изменённых строк.
+
+    Строки с нулевыми счётчиками и оценкой ниже min_score удаляются.
+    Строки с ненулевыми счётчиками остаются даже с малой оценкой: иначе
+    следующий запуск принял бы все старые добавления за новые.
+    """
+    now = timezone.now()
+    created = updated = deleted = 0
+    with transaction.atomic():
+        for batch in iter_recipe_counters(batch_size):
+            rankings = TrendingRecipe.objects.in_bulk(
+                [recipe_id for recipe_id, _, _ in batch]
+            )
+            to_create, to_update, to_delete = [], [], set()
+            for recipe_id, favorites, carts in batch:
+                ranking = rankings.get(recipe_id)
+                if ranking is None:
+                    ranking = TrendingRecipe(
+                        recipe_id=recipe_id,
+                        score=0.0,
+                        favorites_count=0,
+                        in_carts_count=0,
+                        updated_at=now,
+                    )
+                    to_create.append(ranking)
+                else:
+                    to_update.append(ranking)
+                ranking.score = (
+                    ranking.score * decay_factor(
+                        now - ranking.updated_at, half_life
+                    )
+                    + favorite_weight * max(
+                        favorites - ranking.favorites_count, 0
+                    )
+                    + cart_weight * max(carts - ranking.in_carts_count, 0)
+                )
+                ranking.favorites_count = favorites
+                ranking.in_carts_count = carts
+                ranking.updated_at = now
+                if not favorites and not carts and ranking.score < min_score:
+                    to_delete.add(recipe_id)
+            to_create = [
+                ranking for ranking in to_create
+                if ranking.recipe_id not in to_delete
+            ]
+            to_update = [
+                ranking for ranking in to_update
+                if ranking.recipe_id not in to_delete
+            ]
+            TrendingRecipe.objects.bulk_create(to_create)
+            TrendingRecipe.objects.bulk_update(
+                to_update,
+                ('score', 'favorites_count', 'in_carts_count', 'updated_at'),
+            )
+            deleted += TrendingRecipe.objects.filter(
+                recipe_id__in=to_delete
+            ).delete()[0]
+            created += len(to_create)
+            updated += len(to_update)
+    bump_table_version(TrendingRecipe)
+    return created, updated, deleted
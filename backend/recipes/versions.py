@@ -0,0 +1,60 @@
+"""Версии таблиц и объектов для ключей кэша.
+
+Версии хранятся в кэше без срока жизни и меняются только при изменении
+данных, поэтому кэш должен быть общим для всех процессов (recipes.E001).
+"""
+import time
+
+from django.core.cache import cache
+
+
+def version_key(model, pk=None):
+    """Ключ кэша с версией таблицы или отдельного объекта модели."""
+    key = f'version:{model._meta.label_lower}'
+    if pk is None:
+        return key
+    return f'{key}:{pk}'
+
+
+def user_state_key(user_id):
+    """Ключ кэша с версией избранного, корзины и подписок пользователя."""
+    return f'version:user_state:{user_id}'
+
+
+def get_table_version(model):
+    """Возвращает текущую версию содержимого таблицы модели."""
+    key = version_key(model)
+    return get_versions([key])[key]
+
+
+def set_version(key):
+    cache.set(key, time.time_ns(), None)
+
+
+def bump_table_version(model):
+    """Помечает таблицу модели как изменённую."""
+    set_version(version_key(model))
+
+
+def bump_object_version(model, pk):
+    """Помечает объект модели как изменённый."""
+    set_version(version_key(model, pk))
+
+
+def bump_user_state_version(user_id):
+    """Помечает избранное, корзину или подписки пользователя изменёнными."""
+    set_version(user_state_key(user_id))
+
+
+def get_versions(keys):
+    """Возвращает версии по ключам, заводя новые для отсутствующих.
+
+    Отсутствующая версия (ещё не создана или вытеснена из кэша) получает
+    новое значение, чтобы не совпасть ни с одним из старых фрагментов.
+    """
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return versions
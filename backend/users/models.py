@@ -46,6 +46,12 @@ class User(AbstractUser):
         verbose_name='Аватар',
         help_text='Загрузите аватара'
     )
+    avatar_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии аватара',
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
@@ -77,6 +83,11 @@ class Follow(models.Model):
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
         unique_together = ('user', 'following')
+        indexes = (
+            models.Index(
+                fields=('following', 'user'), name='follow_following_user_idx'
+            ),
+        )
 
     def __str__(self):
         """Возвращает строковое представление подписки."""